@@ -1,9 +1,9 @@
 # agents.py
-import json
+import asyncio
 import logging
 from typing import List, Dict, Any, Optional
-from autogen import AssistantAgent, GroupChatManager, GroupChat
-from config import OPENROUTER_API_KEY, get_max_rounds
+from autogen import Agent, AssistantAgent, GroupChatManager, GroupChat
+from config import OPENROUTER_API_KEY, RATE_LIMITS, MAX_ROUNDS
 from memory import memory_manager
 from utils import load_schema, extract_consensus_indicator
 from conversation_state import ConversationState
@@ -12,194 +12,305 @@ from conversation_state import ConversationState
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def create_agents(task_id: str, conversation_state: ConversationState) -> List[AssistantAgent]:
+# LLM configs with proper model names, shared by every agent using the same model
+# (AutoGen copies llm_config per agent, so sharing the dicts is safe)
+PRIMARY_LLM_CONFIG = {
+    "config_list": [{
+        "model": "openai/gpt-4o-mini",
+        "api_key": OPENROUTER_API_KEY,
+        "base_url": "https://openrouter.ai/api/v1",
+        "api_type": "openai"
+    }],
+    "temperature": 0.7
+}
+
+SECONDARY_LLM_CONFIG = {
+    "config_list": [{
+        "model": "anthropic/claude-3.5-sonnet",
+        "api_key": OPENROUTER_API_KEY,
+        "base_url": "https://openrouter.ai/api/v1",
+        "api_type": "openai"
+    }],
+    "temperature": 0.7
+}
+
+# Enhanced base prompt with clear wireframe requirements
+BASE_PROMPT = (
+    "Focus on user value and lean MVP development. "
+    "Build on others' inputs. Use @AgentName to mention others. "
+    "Reach consensus on screens/components. Max leads consensus. "
+    "CRITICAL: When consensus is reached, Max MUST output 'CONSENSUS REACHED:' followed by a complete wireframe JSON with actual data (not schema definitions)."
+)
+
+# Per-task context goes last so the static prefix stays cacheable by the provider
+CONTEXT_PROMPT_TEMPLATE = "Previous context: {context}."
+
+# Clear termination rules with specific JSON structure requirements
+TERMINATION_PROMPT = (
+    "TERMINATION: Max outputs 'CONSENSUS REACHED:' + COMPLETE WIREFRAME JSON when agreed. "
+    "The JSON MUST include: app object with name, description, screens array, and version_history. "
+    "Each screen must have screen_id, name, purpose, layout, components, navigation, and state. "
+    "Each component must have component_id, type, purpose, properties (size, position, style, content, interactions), and children. "
+    "After 3 rounds without consensus, Max forces decision. Maximum 15 rounds. Focus on user value."
+)
+
+# Enhanced example output format for Max agent with clear structure.
+# Kept as the pre-serialized json.dumps(..., indent=2) text so nothing is built at import.
+EXAMPLE_JSON_STR = """{
+  "app": {
+    "name": "AI Agent Platform",
+    "description": "Platform for marketing teams to onboard AI agents and manage content creation tasks",
+    "screens": [
+      {
+        "screen_id": "onboarding",
+        "name": "Onboarding Screen",
+        "purpose": "User setup and business context configuration",
+        "layout": {
+          "type": "stack",
+          "orientation": "vertical",
+          "constraints": {
+            "width": "100%",
+            "height": "100%"
+          }
+        },
+        "components": [
+          {
+            "component_id": "business_context_form",
+            "type": "form",
+            "purpose": "Capture business context and tone of voice",
+            "properties": {
+              "size": {
+                "width": "100%",
+                "height": "auto"
+              },
+              "position": {
+                "x": "0",
+                "y": "0"
+              },
+              "style": {
+                "background": "white"
+              },
+              "content": "Business Context Form",
+              "interactions": [
+                {
+                  "trigger": "onSubmit",
+                  "action": "navigate",
+                  "target": "agent_creation"
+                }
+              ]
+            },
+            "children": []
+          }
+        ],
+        "navigation": {
+          "entry_points": [],
+          "exit_points": [
+            {
+              "to_screen_id": "agent_creation",
+              "trigger": "form_submit",
+              "conditions": "none"
+            }
+          ]
+        },
+        "state": {
+          "dynamic_elements": []
+        }
+      }
+    ],
+    "version_history": [
+      {
+        "version": "1.0",
+        "date": "2024-01-01",
+        "changes": [
+          {
+            "screen_id": "onboarding",
+            "component_id": "business_context_form",
+            "change_description": "Initial creation",
+            "author": "LLM"
+          }
+        ]
+      }
+    ]
+  }
+}"""
+
+# Fan-out rounds: Max drafts, the other agents critique the draft independently
+PROPOSER_AGENT_NAME = "Max"
+CRITIC_AGENT_NAMES = ("Alex", "Sam", "Jamie", "CustomerAdvocate")
+
+# Static system prompts; every agent's message starts with its prompt unchanged
+MAX_SYSTEM_PROMPT = (
+    f"You are Max, Product Manager. Lead consensus on MVP screens/components. "
+    f"{BASE_PROMPT} {TERMINATION_PROMPT} "
+    f"CRITICAL: When consensus is reached, output 'CONSENSUS REACHED:' followed by COMPLETE wireframe JSON data (not schema). "
+    f"The JSON must include: app object with name, description, screens array, and version_history. "
+    f"Each screen must have screen_id, name, purpose, layout, components, navigation, and state. "
+    f"Each component must have component_id, type, purpose, properties (size, position, style, content, interactions), and children array. "
+    f"EXAMPLE OUTPUT FORMAT:\n"
+    f"CONSENSUS REACHED:\n"
+    f"{EXAMPLE_JSON_STR}\n"
+    f"DO NOT output schema definitions - output actual wireframe data. "
+    f"Ensure the JSON is properly formatted and complete."
+)
+
+ALEX_SYSTEM_PROMPT = (
+    f"You are Alex, Product Designer. Focus on UX, accessibility, user journeys. "
+    f"{BASE_PROMPT} Challenge designs that don't prioritize user experience. "
+    f"Use @Max, @Sam, @Jamie to mention others. "
+    f"Ensure wireframe components are user-friendly and accessible."
+)
+
+SAM_SYSTEM_PROMPT = (
+    f"You are Sam, Engineer. Focus on technical feasibility, performance, scalability. "
+    f"{BASE_PROMPT} Suggest minimal tech stacks. Challenge complex features. "
+    f"Use @Max, @Alex, @Jamie to mention others. "
+    f"Ensure wireframe components are technically feasible."
+)
+
+JAMIE_SYSTEM_PROMPT = (
+    f"You are Jamie, QA Engineer. Focus on quality, testing, edge cases. "
+    f"{BASE_PROMPT} Challenge assumptions. Advocate for robust solutions. "
+    f"Use @Max, @Alex, @Sam to mention others. "
+    f"Ensure wireframe components are testable and handle edge cases."
+)
+
+CUSTOMER_ADVOCATE_SYSTEM_PROMPT = (
+    f"You are Customer Advocate. Focus on user needs, pain points, business value. "
+    f"{BASE_PROMPT} Challenge features that don't solve real problems. "
+    f"Use @Max, @Alex, @Sam, @Jamie to mention others. "
+    f"Ensure wireframe components solve real user problems."
+)
+
+def _system_message(static_prompt: str, context_prompt: str) -> str:
     """
-    Create enhanced agents with simplified, clear prompts and better communication.
+    Compose a system message with the static prompt as a stable prefix.
+    
+    OpenAI models served through OpenRouter cache repeated prompt prefixes
+    automatically, so the per-task context is appended last.
     
     Args:
-        task_id: Unique identifier for the task
-        conversation_state: Conversation state tracker
+        static_prompt: Prompt text shared by every task
+        context_prompt: Per-task context text
         
     Returns:
-        List of configured agents
+        System message string
     """
-    # Load conversation context (limit to recent messages)
-    context = memory_manager.load_conversation(task_id)
-    context_summary = memory_manager.get_conversation_summary(task_id, max_messages=3)
+    return f"{static_prompt} {context_prompt}"
+
+def _cached_system_message(static_prompt: str, context_prompt: str) -> List[Dict[str, Any]]:
+    """
+    Compose a system message with an explicit cache breakpoint after the static prompt.
     
-    # Enhanced base prompt with clear wireframe requirements
-    base_prompt = (
-        f"Focus on user value and lean MVP development. "
-        f"Previous context: {context_summary[:500] if context_summary else 'None'}. "
-        f"Build on others' inputs. Use @AgentName to mention others. "
-        f"Reach consensus on screens/components. Max leads consensus. "
-        f"CRITICAL: When consensus is reached, Max MUST output 'CONSENSUS REACHED:' followed by a complete wireframe JSON with actual data (not schema definitions)."
-    )
+    Anthropic models need a `cache_control` marker on the content block to
+    reuse the prefix; OpenRouter forwards it unchanged.
     
-    # Clear termination rules with specific JSON structure requirements
-    termination_prompt = (
-        "TERMINATION: Max outputs 'CONSENSUS REACHED:' + COMPLETE WIREFRAME JSON when agreed. "
-        "The JSON MUST include: app object with name, description, screens array, and version_history. "
-        "Each screen must have screen_id, name, purpose, layout, components, navigation, and state. "
-        "Each component must have component_id, type, purpose, properties (size, position, style, content, interactions), and children. "
-        "After 3 rounds without consensus, Max forces decision. Maximum 15 rounds. Focus on user value."
+    Args:
+        static_prompt: Prompt text shared by every task
+        context_prompt: Per-task context text
+        
+    Returns:
+        List of content blocks for the system message
+    """
+    return [
+        {"type": "text", "text": static_prompt, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": context_prompt}
+    ]
+
+# Static prompt and system message composer of each discussing agent, by name
+AGENT_SYSTEM_PROMPTS = {
+    "Max": (MAX_SYSTEM_PROMPT, _system_message),
+    "Alex": (ALEX_SYSTEM_PROMPT, _system_message),
+    "Sam": (SAM_SYSTEM_PROMPT, _system_message),
+    "Jamie": (JAMIE_SYSTEM_PROMPT, _system_message),
+    "CustomerAdvocate": (CUSTOMER_ADVOCATE_SYSTEM_PROMPT, _cached_system_message)
+}
+
+def _context_prompt(task_id: str) -> str:
+    """Build the "Previous context" prompt from the task's recent stored messages."""
+    context_summary = memory_manager.get_conversation_summary(task_id, max_messages=3)
+    return CONTEXT_PROMPT_TEMPLATE.format(
+        context=context_summary[:500] if context_summary else 'None'
     )
+
+def refresh_agent_context(agents: List[Agent], task_id: str) -> None:
+    """
+    Rebuild the previous-context part of the discussing agents' system messages.
     
-    # Create LLM configs with proper model names
-    primary_config = {
-        "config_list": [{
-            "model": "openai/gpt-4o-mini",
-            "api_key": OPENROUTER_API_KEY,
-            "base_url": "https://openrouter.ai/api/v1",
-            "api_type": "openai"
-        }],
-        "temperature": 0.7
-    }
-    
-    secondary_config = {
-        "config_list": [{
-            "model": "anthropic/claude-3.5-sonnet",
-            "api_key": OPENROUTER_API_KEY,
-            "base_url": "https://openrouter.ai/api/v1",
-            "api_type": "openai"
-        }],
-        "temperature": 0.7
-    }
-    
-    # Enhanced example output format for Max agent with clear structure
-    example_output = {
-        "app": {
-            "name": "AI Agent Platform",
-            "description": "Platform for marketing teams to onboard AI agents and manage content creation tasks",
-            "screens": [
-                {
-                    "screen_id": "onboarding",
-                    "name": "Onboarding Screen",
-                    "purpose": "User setup and business context configuration",
-                    "layout": {
-                        "type": "stack",
-                        "orientation": "vertical",
-                        "constraints": {
-                            "width": "100%",
-                            "height": "100%"
-                        }
-                    },
-                    "components": [
-                        {
-                            "component_id": "business_context_form",
-                            "type": "form",
-                            "purpose": "Capture business context and tone of voice",
-                            "properties": {
-                                "size": {"width": "100%", "height": "auto"},
-                                "position": {"x": "0", "y": "0"},
-                                "style": {"background": "white"},
-                                "content": "Business Context Form",
-                                "interactions": [
-                                    {
-                                        "trigger": "onSubmit",
-                                        "action": "navigate",
-                                        "target": "agent_creation"
-                                    }
-                                ]
-                            },
-                            "children": []
-                        }
-                    ],
-                    "navigation": {
-                        "entry_points": [],
-                        "exit_points": [
-                            {
-                                "to_screen_id": "agent_creation",
-                                "trigger": "form_submit",
-                                "conditions": "none"
-                            }
-                        ]
-                    },
-                    "state": {
-                        "dynamic_elements": []
-                    }
-                }
-            ],
-            "version_history": [
-                {
-                    "version": "1.0",
-                    "date": "2024-01-01",
-                    "changes": [
-                        {
-                            "screen_id": "onboarding",
-                            "component_id": "business_context_form",
-                            "change_description": "Initial creation",
-                            "author": "LLM"
-                        }
-                    ]
-                }
-            ]
-        }
-    }
+    The context is a snapshot of the task's memory taken when the agents are
+    created, so agents reused for a later run of the same task call this to
+    see the conversation recorded since then.
     
-    # Convert example to JSON string for the prompt
-    example_json_str = json.dumps(example_output, indent=2)
+    Args:
+        agents: Agents created by create_agents for the task
+        task_id: Unique identifier for the task
+    """
+    context_prompt = _context_prompt(task_id)
+    for agent in agents:
+        prompt = AGENT_SYSTEM_PROMPTS.get(agent.name)
+        if prompt is not None:
+            static_prompt, compose = prompt
+            agent.update_system_message(compose(static_prompt, context_prompt))
+
+class AgentBundle(tuple):
+    """
+    The agents of a team, the Admin agent first.
+    
+    Behaves as a tuple of every agent (so it can be iterated, counted and
+    handed to a GroupChat) and exposes the Admin agent and the discussing
+    agents by name instead of by position.
+    """
+    
+    def __new__(cls, admin: Agent, others: List[Agent]):
+        others = tuple(others)
+        bundle = super().__new__(cls, (admin, *others))
+        bundle.admin = admin
+        bundle.others = others
+        return bundle
+
+def create_agents(task_id: str, conversation_state: ConversationState) -> AgentBundle:
+    """
+    Create enhanced agents with simplified, clear prompts and better communication.
+    
+    Args:
+        task_id: Unique identifier for the task
+        conversation_state: Conversation state tracker
+        
+    Returns:
+        Bundle of configured agents, the Admin agent first
+    """
+    # Only the previous-context summary varies per task
+    context_prompt = _context_prompt(task_id)
     
     max_agent = AssistantAgent(
         name="Max",
-        system_message=(
-            f"You are Max, Product Manager. Lead consensus on MVP screens/components. "
-            f"{base_prompt} {termination_prompt} "
-            f"CRITICAL: When consensus is reached, output 'CONSENSUS REACHED:' followed by COMPLETE wireframe JSON data (not schema). "
-            f"The JSON must include: app object with name, description, screens array, and version_history. "
-            f"Each screen must have screen_id, name, purpose, layout, components, navigation, and state. "
-            f"Each component must have component_id, type, purpose, properties (size, position, style, content, interactions), and children array. "
-            f"EXAMPLE OUTPUT FORMAT:\n"
-            f"CONSENSUS REACHED:\n"
-            f"{example_json_str}\n"
-            f"DO NOT output schema definitions - output actual wireframe data. "
-            f"Ensure the JSON is properly formatted and complete."
-        ),
-        llm_config=primary_config,
+        system_message=_system_message(MAX_SYSTEM_PROMPT, context_prompt),
+        llm_config=PRIMARY_LLM_CONFIG,
     )
     
     alex_agent = AssistantAgent(
         name="Alex",
-        system_message=(
-            f"You are Alex, Product Designer. Focus on UX, accessibility, user journeys. "
-            f"{base_prompt} Challenge designs that don't prioritize user experience. "
-            f"Use @Max, @Sam, @Jamie to mention others. "
-            f"Ensure wireframe components are user-friendly and accessible."
-        ),
-        llm_config=primary_config,
+        system_message=_system_message(ALEX_SYSTEM_PROMPT, context_prompt),
+        llm_config=PRIMARY_LLM_CONFIG,
     )
     
     sam_agent = AssistantAgent(
         name="Sam",
-        system_message=(
-            f"You are Sam, Engineer. Focus on technical feasibility, performance, scalability. "
-            f"{base_prompt} Suggest minimal tech stacks. Challenge complex features. "
-            f"Use @Max, @Alex, @Jamie to mention others. "
-            f"Ensure wireframe components are technically feasible."
-        ),
-        llm_config=primary_config,
+        system_message=_system_message(SAM_SYSTEM_PROMPT, context_prompt),
+        llm_config=PRIMARY_LLM_CONFIG,
     )
     
     jamie_agent = AssistantAgent(
         name="Jamie",
-        system_message=(
-            f"You are Jamie, QA Engineer. Focus on quality, testing, edge cases. "
-            f"{base_prompt} Challenge assumptions. Advocate for robust solutions. "
-            f"Use @Max, @Alex, @Sam to mention others. "
-            f"Ensure wireframe components are testable and handle edge cases."
-        ),
-        llm_config=primary_config,
+        system_message=_system_message(JAMIE_SYSTEM_PROMPT, context_prompt),
+        llm_config=PRIMARY_LLM_CONFIG,
     )
     
+    # Content blocks carry the cache marker; the group chat needs a plain-text description
     customer_advocate = AssistantAgent(
         name="CustomerAdvocate",
-        system_message=(
-            f"You are Customer Advocate. Focus on user needs, pain points, business value. "
-            f"{base_prompt} Challenge features that don't solve real problems. "
-            f"Use @Max, @Alex, @Sam, @Jamie to mention others. "
-            f"Ensure wireframe components solve real user problems."
-        ),
-        llm_config=secondary_config,
+        system_message=_cached_system_message(CUSTOMER_ADVOCATE_SYSTEM_PROMPT, context_prompt),
+        description=CUSTOMER_ADVOCATE_SYSTEM_PROMPT,
+        llm_config=SECONDARY_LLM_CONFIG,
     )
     
     # Admin agent
@@ -210,7 +321,27 @@ def create_agents(task_id: str, conversation_state: ConversationState) -> List[A
         llm_config=False,
     )
     
-    return [user_proxy, max_agent, alex_agent, sam_agent, jamie_agent, customer_advocate]
+    return AgentBundle(user_proxy, [max_agent, alex_agent, sam_agent, jamie_agent, customer_advocate])
+
+def _max_rounds_for_context(context_length: int) -> int:
+    """
+    Determine the group chat's max rounds from how much history the task has.
+    
+    Args:
+        context_length: Number of recent stored messages (at most 10 are loaded)
+        
+    Returns:
+        Maximum number of rounds
+    """
+    base_rounds = MAX_ROUNDS
+    
+    # Only reduce rounds for very complex discussions (more than 10 previous messages)
+    if context_length > 10:
+        base_rounds = max(8, base_rounds - 5)
+    elif context_length > 5:
+        base_rounds = max(10, base_rounds - 3)
+    
+    return base_rounds
 
 def setup_group_chat(agents: List[AssistantAgent], task_id: str, conversation_state: ConversationState) -> GroupChatManager:
     """
@@ -225,45 +356,143 @@ def setup_group_chat(agents: List[AssistantAgent], task_id: str, conversation_st
         Group chat manager
     """
     # Load previous messages (limit to recent)
-    previous_messages = memory_manager.load_conversation(task_id)
-    recent_messages = previous_messages[-10:] if len(previous_messages) > 10 else previous_messages
-    
-    # Determine max rounds based on conversation complexity
-    base_rounds = get_max_rounds()
-    context_length = len(recent_messages)
-    
-    # Only reduce rounds for very complex discussions (more than 10 previous messages)
-    if context_length > 10:
-        base_rounds = max(8, base_rounds - 5)
-    elif context_length > 5:
-        base_rounds = max(10, base_rounds - 3)
+    recent_messages = memory_manager.load_conversation(task_id, limit=10)
+    base_rounds = _max_rounds_for_context(len(recent_messages))
     
     # Create group chat with clean message format
     group_chat = GroupChat(
-        agents=agents,
+        agents=list(agents),
         messages=[msg.get("content", msg.get("message", "")) for msg in recent_messages],
         max_round=base_rounds,
     )
     
     # Create manager with proper configuration
-    manager_config = {
-        "config_list": [{
-            "model": "openai/gpt-4o-mini",
-            "api_key": OPENROUTER_API_KEY,
-            "base_url": "https://openrouter.ai/api/v1",
-            "api_type": "openai"
-        }],
-        "temperature": 0.7
-    }
-    
     manager = GroupChatManager(
         groupchat=group_chat,
-        llm_config=manager_config,
+        llm_config=PRIMARY_LLM_CONFIG,
     )
     
     logger.info(f"Setup group chat with {len(agents)} agents, max rounds: {base_rounds}")
     return manager
 
+def refresh_group_chat(manager: GroupChatManager, task_id: str) -> None:
+    """
+    Reapply the history-dependent round limit to a reused group chat manager.
+    
+    setup_group_chat sets max_round from the task's stored messages at the
+    time, so a manager reused for a later run of the same task calls this
+    to get the limit for the history recorded since then.
+    
+    Args:
+        manager: Group chat manager from setup_group_chat
+        task_id: Unique identifier for the task
+    """
+    recent_messages = memory_manager.load_conversation(task_id, limit=10)
+    manager.groupchat.max_round = _max_rounds_for_context(len(recent_messages))
+
+async def a_run_group_chat(agents: AgentBundle, manager: GroupChatManager, message: str, fanout: bool = False) -> Any:
+    """
+    Run the group chat without blocking the event loop on each LLM round-trip.
+    
+    With fanout, the opening critique round runs concurrently before the
+    group chat: Max drafts a proposal, the critics review it in parallel
+    (see a_fanout_round) and the chat starts from the combined result, so
+    that round costs about one LLM latency instead of one per critic.
+    
+    Args:
+        agents: Agents from create_agents
+        manager: Group chat manager from setup_group_chat
+        message: Initial message for the conversation
+        fanout: Whether to run the opening critique round concurrently
+        
+    Returns:
+        AutoGen chat result
+    """
+    if fanout:
+        message = await a_fanout_round(agents, message)
+    return await agents.admin.a_initiate_chat(manager, message=message)
+
+def _reply_text(reply: Any) -> str:
+    """Return the text of an agent reply (a string or a message dictionary)."""
+    if isinstance(reply, dict):
+        return reply.get("content") or ""
+    return reply or ""
+
+async def a_fanout_round(agents: AgentBundle, message: str) -> str:
+    """
+    Run a proposal and its critiques, with the critiques generated concurrently.
+    
+    Args:
+        agents: Agents from create_agents
+        message: Initial message for the conversation
+        
+    Returns:
+        The initial message extended with the proposal and critiques
+    """
+    by_name = {agent.name: agent for agent in agents.others}
+    proposer = by_name.get(PROPOSER_AGENT_NAME)
+    critics = [by_name[name] for name in CRITIC_AGENT_NAMES if name in by_name]
+    if proposer is None or not critics:
+        return message
+    
+    context = [{"role": "user", "content": message}]
+    proposal = _reply_text(await proposer.a_generate_reply(messages=context, sender=agents.admin))
+    if not proposal:
+        return message
+    
+    context.append({"role": "user", "name": proposer.name, "content": proposal})
+    critiques = await a_gather_replies(critics, context, sender=proposer)
+    
+    parts = [message, f"\n\n{proposer.name}'s initial proposal:\n{proposal}", "\n\nInitial critiques:"]
+    for name, reply in critiques.items():
+        text = _reply_text(reply)
+        if text:
+            parts.append(f"\n- {name}: {text}")
+    parts.append(f"\n\n{proposer.name}: synthesize the critiques and continue toward consensus.")
+    
+    logger.info(f"Fan-out round collected {sum(1 for reply in critiques.values() if reply)} critiques")
+    return "".join(parts)
+
+async def a_gather_replies(
+    agents: List[AssistantAgent],
+    messages: List[Dict[str, Any]],
+    sender: Optional[Agent] = None,
+    max_concurrent: int = RATE_LIMITS["max_concurrent_requests"]
+) -> Dict[str, Any]:
+    """
+    Generate replies from several agents to the same messages concurrently.
+    
+    Used for fan-out rounds where Alex, Sam, Jamie and CustomerAdvocate
+    critique Max's proposal independently. Concurrency is bounded so the
+    OpenRouter rate limit is respected.
+    
+    Args:
+        agents: Agents that should reply
+        messages: Conversation messages to reply to
+        sender: Optional agent the messages came from
+        max_concurrent: Maximum number of in-flight LLM requests
+        
+    Returns:
+        Dictionary mapping agent name to its reply (None if the call failed)
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def _reply(agent: AssistantAgent) -> Any:
+        async with semaphore:
+            return await agent.a_generate_reply(messages=messages, sender=sender)
+    
+    results = await asyncio.gather(*(_reply(agent) for agent in agents), return_exceptions=True)
+    
+    replies = {}
+    for agent, result in zip(agents, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error generating reply from {agent.name}: {result}")
+            replies[agent.name] = None
+        else:
+            replies[agent.name] = result
+    
+    return replies
+
 if __name__ == "__main__":
     # Test agent creation
     test_task_id = "test-task-123"
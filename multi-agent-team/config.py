@@ -25,13 +25,16 @@ MAX_ROUNDS = int(os.getenv("MAX_ROUNDS", "25"))
 RATE_LIMITS = {
     "requests_per_minute": 60,
     "max_tokens_per_request": 4000,
-    "timeout_seconds": 30
+    "timeout_seconds": 30,
+    "max_concurrent_requests": 5
 }
 
 def get_max_rounds() -> int:
     """
     Get the maximum number of rounds for conversations.
     
+    Kept for backward compatibility; internal callers use MAX_ROUNDS directly.
+    
     Returns:
         Maximum number of rounds as an integer
     """
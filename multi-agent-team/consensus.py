@@ -2,50 +2,146 @@
 import logging
 from typing import List, Dict, Any, Tuple, Optional
 import re
+from collections import deque
 from datetime import datetime
+from itertools import combinations
+from indicators import CONSENSUS_ATTEMPT_INDICATORS, PhraseMatcher, extract_topics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Consensus phrases, including the detector's extra signs of team-wide agreement
+CONSENSUS_INDICATORS = CONSENSUS_ATTEMPT_INDICATORS + (
+    "we all agree", "unanimous decision", "collective agreement"
+)
+
+# Agreement indicators
+POSITIVE_INDICATORS = (
+    "agree", "yes", "correct", "right", "good", "excellent",
+    "consensus", "aligned", "support", "approve", "like",
+    "sounds good", "works for me", "i'm on board"
+)
+
+NEGATIVE_INDICATORS = (
+    "disagree", "no", "wrong", "bad", "problem", "issue",
+    "concern", "disapprove", "against", "oppose", "don't like",
+    "not sure", "hesitant", "worried"
+)
+
+# Neutral indicators
+NEUTRAL_INDICATORS = (
+    "maybe", "perhaps", "possibly", "consider", "think about",
+    "explore", "investigate", "look into", "examine"
+)
+
+AGREEMENT_PHRASES = (
+    "i agree", "we agree", "that's right", "exactly",
+    "you're right", "correct", "good point", "makes sense"
+)
+
+STALEMATE_PHRASES = (
+    "agree to disagree", "no consensus", "deadlock", "cannot agree",
+    "stuck", "impasse", "no progress", "going in circles"
+)
+
+# Compiled once at import and shared by every detector; all categories share one memoized scan per message
+MESSAGE_MATCHER = PhraseMatcher({
+    "consensus": CONSENSUS_INDICATORS,
+    "agreement": AGREEMENT_PHRASES,
+    "positive": POSITIVE_INDICATORS,
+    "negative": NEGATIVE_INDICATORS,
+    "neutral": NEUTRAL_INDICATORS,
+    "stalemate": STALEMATE_PHRASES
+})
+
+def _agreement_score(positive_count: int, negative_count: int, neutral_count: int) -> float:
+    """
+    Weight indicator counts into an agreement score for a single message.
+    
+    Args:
+        positive_count: Number of positive indicators found
+        negative_count: Number of negative indicators found
+        neutral_count: Number of neutral indicators found
+        
+    Returns:
+        Agreement score between 0.0 and 1.0
+    """
+    total_indicators = positive_count + negative_count + neutral_count
+    
+    if total_indicators == 0:
+        return 0.5  # Neutral if no indicators found
+    
+    return (positive_count * 1.0 + neutral_count * 0.5) / total_indicators
+
+def _combine_confidence(agreement_level: float, consensus_indicator_count: int, window: int = 3) -> float:
+    """
+    Combine agreement level and recent consensus indicators into a confidence.
+    
+    Args:
+        agreement_level: Overall agreement level
+        consensus_indicator_count: Recent messages containing consensus indicators
+        window: Number of recent messages checked for indicators
+        
+    Returns:
+        Confidence between 0.0 and 1.0
+    """
+    return min(1.0, (agreement_level * 0.7) + (consensus_indicator_count / window * 0.3))
+
 class ConsensusDetector:
     """
     Enhanced consensus detection with confidence scoring and agreement tracking.
     """
     
+    # Phrase tables are shared by all instances
+    consensus_indicators = CONSENSUS_INDICATORS
+    positive_indicators = POSITIVE_INDICATORS
+    negative_indicators = NEGATIVE_INDICATORS
+    neutral_indicators = NEUTRAL_INDICATORS
+    agreement_phrases = AGREEMENT_PHRASES
+    stalemate_phrases = STALEMATE_PHRASES
+    _message_matcher = MESSAGE_MATCHER
+    
     def __init__(self):
         self.consensus_threshold = 0.7  # 70% agreement required
         self.confidence_threshold = 0.6  # 60% confidence required
-        self.agreement_history = []
+        self.agreement_history_size = 256  # Bounded so long-running services don't grow
+        self.agreement_history = deque(maxlen=self.agreement_history_size)
+        self._agreement_sum = 0.0  # Running sum for an O(1) average
         self.consensus_attempts = []
+    
+    @staticmethod
+    def _message_content(msg: Any) -> str:
+        """
+        Extract the text content of a message.
         
-        # Consensus indicators
-        self.consensus_indicators = [
-            "consensus reached", "consensus achieved", "agreed upon",
-            "final decision", "we have consensus", "consensus has been reached",
-            "let's finalize", "ready to move forward", "we should proceed",
-            "we all agree", "unanimous decision", "collective agreement",
-            "consensus reached:", "consensus_reached"
-        ]
-        
-        # Agreement indicators
-        self.positive_indicators = [
-            "agree", "yes", "correct", "right", "good", "excellent",
-            "consensus", "aligned", "support", "approve", "like",
-            "sounds good", "works for me", "I'm on board"
-        ]
-        
-        self.negative_indicators = [
-            "disagree", "no", "wrong", "bad", "problem", "issue",
-            "concern", "disapprove", "against", "oppose", "don't like",
-            "not sure", "hesitant", "worried"
-        ]
-        
-        # Neutral indicators
-        self.neutral_indicators = [
-            "maybe", "perhaps", "possibly", "consider", "think about",
-            "explore", "investigate", "look into", "examine"
-        ]
+        Args:
+            msg: Message dictionary or string
+            
+        Returns:
+            Message content
+        """
+        if isinstance(msg, dict):
+            content = msg["content"] if "content" in msg else msg.get("message", "")
+            return content or ""
+        return str(msg)
+    
+    def _normalize(self, messages: List[Dict[str, Any]]) -> List[str]:
+        """
+        Extract and lowercase message contents once so helpers can share them.
+        
+        This is the only place message shapes (dicts with "content" or
+        "message", or plain strings) are handled; every helper works on the
+        returned strings.
+        
+        Args:
+            messages: List of conversation messages
+            
+        Returns:
+            List of lowercased message contents
+        """
+        message_content = self._message_content
+        return [message_content(msg).lower() for msg in messages]
     
     def detect_consensus_attempt(self, messages: List[Dict[str, Any]]) -> bool:
         """
@@ -60,23 +156,22 @@ class ConsensusDetector:
         if len(messages) < 3:
             return False
         
-        recent_messages = messages[-3:]
         consensus_count = 0
+        recent_contents = self._normalize(messages[-3:])
         
-        for msg in recent_messages:
-            if isinstance(msg, dict):
-                content = msg.get("content", msg.get("message", ""))
-            else:
-                content = str(msg)
+        for index, content_lower in enumerate(recent_contents):
+            # Each remaining message can add at most 1.5; stop once 2 is out of reach
+            if consensus_count + 1.5 * (len(recent_contents) - index) < 2:
+                return False
             
-            content_lower = content.lower()
+            hits = self._message_matcher.find(content_lower, ("consensus", "agreement"))
             
             # Check for consensus indicators
-            if any(indicator in content_lower for indicator in self.consensus_indicators):
+            if hits["consensus"]:
                 consensus_count += 1
             
             # Check for agreement patterns
-            if self._has_agreement_pattern(content_lower):
+            if hits["agreement"]:
                 consensus_count += 0.5
         
         # Record consensus attempt
@@ -101,75 +196,76 @@ class ConsensusDetector:
         Returns:
             Agreement level between 0.0 and 1.0
         """
-        if not messages:
-            return 0.0
-        
-        total_agreement = 0.0
-        message_count = 0
+        return self._agreement_level(self._normalize(messages))
+    
+    def _agreement_level(self, contents: List[str]) -> float:
+        """
+        Calculate the agreement level from already lowercased contents.
         
-        for msg in messages:
-            if isinstance(msg, dict):
-                content = msg.get("content", msg.get("message", ""))
-            else:
-                content = str(msg)
+        Args:
+            contents: Lowercased message contents
             
-            agreement_score = self._calculate_message_agreement(content)
-            total_agreement += agreement_score
-            message_count += 1
+        Returns:
+            Agreement level between 0.0 and 1.0
+        """
+        overall_agreement = self._compute_agreement(contents)
+        if contents:
+            self._record_agreement(overall_agreement)
+        
+        return overall_agreement
+    
+    def _compute_agreement(self, contents: List[str]) -> float:
+        """
+        Compute the agreement level without recording it in the history.
         
-        if message_count == 0:
+        Args:
+            contents: Lowercased message contents
+            
+        Returns:
+            Agreement level between 0.0 and 1.0
+        """
+        if not contents:
             return 0.0
         
-        overall_agreement = total_agreement / message_count
-        self.agreement_history.append(overall_agreement)
+        return sum(map(self._calculate_message_agreement, contents)) / len(contents)
+    
+    def _record_agreement(self, agreement_level: float) -> None:
+        """
+        Append to the bounded agreement history and keep the running sum in step.
         
-        return overall_agreement
+        Args:
+            agreement_level: Agreement level to record
+        """
+        if len(self.agreement_history) == self.agreement_history.maxlen:
+            self._agreement_sum -= self.agreement_history[0]
+        self.agreement_history.append(agreement_level)
+        self._agreement_sum += agreement_level
     
-    def _calculate_message_agreement(self, content: str) -> float:
+    def _calculate_message_agreement(self, content_lower: str) -> float:
         """
         Calculate agreement score for a single message.
         
         Args:
-            content: Message content
+            content_lower: Lowercased message content
             
         Returns:
             Agreement score between 0.0 and 1.0
         """
-        content_lower = content.lower()
-        
-        positive_count = sum(1 for indicator in self.positive_indicators if indicator in content_lower)
-        negative_count = sum(1 for indicator in self.negative_indicators if indicator in content_lower)
-        neutral_count = sum(1 for indicator in self.neutral_indicators if indicator in content_lower)
-        
-        total_indicators = positive_count + negative_count + neutral_count
-        
-        if total_indicators == 0:
-            return 0.5  # Neutral if no indicators found
-        
-        # Calculate weighted agreement score
-        agreement_score = (positive_count * 1.0 + neutral_count * 0.5) / total_indicators
-        
-        return agreement_score
+        counts = self._message_matcher.counts(content_lower, ("positive", "negative", "neutral"))
+        return _agreement_score(counts["positive"], counts["negative"], counts["neutral"])
     
-    def _has_agreement_pattern(self, content: str) -> bool:
+    def _has_agreement_pattern(self, content_lower: str) -> bool:
         """
         Check if content has agreement patterns.
         
         Args:
-            content: Message content
+            content_lower: Lowercased message content
             
         Returns:
             True if agreement pattern detected
         """
-        content_lower = content.lower()
-        
         # Check for explicit agreement phrases
-        agreement_phrases = [
-            "i agree", "we agree", "that's right", "exactly",
-            "you're right", "correct", "good point", "makes sense"
-        ]
-        
-        return any(phrase in content_lower for phrase in agreement_phrases)
+        return bool(self._message_matcher.find(content_lower, ("agreement",))["agreement"])
     
     def detect_stalemate(self, messages: List[Dict[str, Any]], agreement_level: float) -> bool:
         """
@@ -185,24 +281,30 @@ class ConsensusDetector:
         if len(messages) < 5:
             return False
         
-        # Check for stalemate indicators
-        stalemate_phrases = [
-            "agree to disagree", "no consensus", "deadlock", "cannot agree",
-            "stuck", "impasse", "no progress", "going in circles"
-        ]
-        
-        recent_content = " ".join([
-            msg.get("content", msg.get("message", str(msg))).lower() 
-            for msg in messages[-5:]
-        ])
-        
-        stalemate_count = sum(1 for phrase in stalemate_phrases if phrase in recent_content)
-        
         # Check for low agreement over multiple rounds
         if agreement_level < 0.3 and len(messages) > 10:
             return True
         
-        return stalemate_count >= 2
+        return self._has_stalemate_phrases(self._normalize(messages[-5:]))
+    
+    def _has_stalemate_phrases(self, recent_contents: List[str]) -> bool:
+        """
+        Check the lowercased contents of the last five messages for stalemate phrases.
+        
+        Args:
+            recent_contents: Lowercased contents of the most recent messages
+            
+        Returns:
+            True if at least two stalemate phrases are present
+        """
+        # Scan each message (reusing cached scans) and stop at the second distinct phrase
+        stalemate_phrases = set()
+        for content_lower in recent_contents:
+            stalemate_phrases |= self._message_matcher.find(content_lower, ("stalemate",))["stalemate"]
+            if len(stalemate_phrases) >= 2:
+                return True
+        
+        return False
     
     def _detect_repetition(self, messages: List[Dict[str, Any]]) -> bool:
         """
@@ -217,23 +319,28 @@ class ConsensusDetector:
         if len(messages) < 3:
             return False
         
-        recent_messages = messages[-3:]
-        content_similarity = 0
-        
-        for i in range(len(recent_messages) - 1):
-            for j in range(i + 1, len(recent_messages)):
-                content1 = recent_messages[i].get("content", recent_messages[i].get("message", str(recent_messages[i]))).lower()
-                content2 = recent_messages[j].get("content", recent_messages[j].get("message", str(recent_messages[j]))).lower()
-                
-                # Simple similarity check
-                words1 = set(content1.split())
-                words2 = set(content2.split())
-                
-                if words1 and words2:
-                    similarity = len(words1.intersection(words2)) / len(words1.union(words2))
-                    content_similarity = max(content_similarity, similarity)
-        
-        return content_similarity > 0.7
+        return self._is_repetition(self._normalize(messages[-3:]))
+    
+    def _is_repetition(self, recent_contents: List[str]) -> bool:
+        """
+        Detect repetition among lowercased message contents.
+        
+        Args:
+            recent_contents: Lowercased contents of the most recent messages
+            
+        Returns:
+            True if repetition detected
+        """
+        # Tokenize each message once, then compare every pair (Jaccard similarity)
+        token_sets = [frozenset(content.split()) for content in recent_contents]
+        
+        for words1, words2 in combinations(token_sets, 2):
+            if words1 and words2:
+                similarity = len(words1 & words2) / len(words1 | words2)
+                if similarity > 0.7:
+                    return True
+        
+        return False
     
     def _extract_topics(self, content: str) -> List[str]:
         """
@@ -245,23 +352,7 @@ class ConsensusDetector:
         Returns:
             List of extracted topics
         """
-        topics = []
-        content_lower = content.lower()
-        
-        # Common app development topics
-        topic_keywords = {
-            "user experience": ["ux", "user experience", "user interface", "ui"],
-            "technical": ["technical", "feasibility", "implementation", "architecture"],
-            "business": ["business", "value", "roi", "market"],
-            "quality": ["quality", "testing", "qa", "reliability"],
-            "design": ["design", "layout", "components", "wireframe"]
-        }
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                topics.append(topic)
-        
-        return topics
+        return list(extract_topics(content.lower()))
     
     def get_consensus_confidence(self, messages: List[Dict[str, Any]]) -> float:
         """
@@ -276,20 +367,19 @@ class ConsensusDetector:
         if not messages:
             return 0.0
         
+        contents = self._normalize(messages)
+        
         # Calculate agreement level
-        agreement_level = self.calculate_agreement_level(messages)
+        agreement_level = self._agreement_level(contents)
         
         # Check for consensus indicators
-        consensus_indicator_count = 0
-        for msg in messages[-3:]:
-            content = msg.get("content", msg.get("message", str(msg))).lower()
-            if any(indicator in content for indicator in self.consensus_indicators):
-                consensus_indicator_count += 1
+        consensus_indicator_count = sum(
+            1 for content in contents[-3:]
+            if self._message_matcher.find(content, ("consensus",))["consensus"]
+        )
         
         # Calculate confidence based on agreement and consensus indicators
-        confidence = (agreement_level * 0.7) + (consensus_indicator_count / 3 * 0.3)
-        
-        return min(1.0, confidence)
+        return _combine_confidence(agreement_level, consensus_indicator_count)
     
     def should_force_consensus(self, messages: List[Dict[str, Any]], round_count: int) -> bool:
         """
@@ -302,22 +392,28 @@ class ConsensusDetector:
         Returns:
             True if consensus should be forced
         """
+        # Cheapest checks first
         # Force consensus after 15 rounds
         if round_count >= 15:
             return True
         
-        # Force consensus if stalemate detected
-        if self.detect_stalemate(messages, self.calculate_agreement_level(messages)):
+        # Force consensus if multiple consensus attempts failed
+        if len(self.consensus_attempts) >= 3:
             return True
         
-        # Force consensus if repetition detected
-        if self._detect_repetition(messages):
-            return True
+        recent_contents = self._normalize(messages[-5:])
         
-        # Force consensus if multiple consensus attempts failed
-        if len(self.consensus_attempts) >= 3:
+        # Force consensus if repetition detected (last 3 messages)
+        if len(recent_contents) >= 3 and self._is_repetition(recent_contents[-3:]):
             return True
         
+        # Force consensus if stalemate detected (last 5 messages, then full-history agreement)
+        if len(messages) >= 5:
+            if self._has_stalemate_phrases(recent_contents):
+                return True
+            if len(messages) > 10 and self._compute_agreement(self._normalize(messages)) < 0.3:
+                return True
+        
         return False
     
     def get_consensus_summary(self) -> Dict[str, Any]:
@@ -329,8 +425,8 @@ class ConsensusDetector:
         """
         return {
             "consensus_attempts": len(self.consensus_attempts),
-            "agreement_history": self.agreement_history[-5:] if self.agreement_history else [],
-            "average_agreement": sum(self.agreement_history) / len(self.agreement_history) if self.agreement_history else 0.0,
+            "agreement_history": list(self.agreement_history)[-5:],
+            "average_agreement": self._agreement_sum / len(self.agreement_history) if self.agreement_history else 0.0,
             "last_consensus_attempt": self.consensus_attempts[-1] if self.consensus_attempts else None
         }
 
@@ -1,55 +1,129 @@
 # conversation_state.py
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from config import get_max_rounds
+import string
+import time
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+from config import MAX_ROUNDS
+from collections import deque
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import combinations
 import re
+from similarity import minhash_signature, signature_similarity
+from indicators import CONSENSUS_ATTEMPT_INDICATORS, TOPIC_KEYWORDS, PhraseMatcher, extract_topics
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Consensus detection parameters
+CONSENSUS_INDICATORS = CONSENSUS_ATTEMPT_INDICATORS
+
+# Explicit markers that end the conversation
+CONSENSUS_REACHED_MARKERS = ("consensus reached:", "consensus_reached")
+
+# Stalemate detection parameters
+STALEMATE_PHRASES = (
+    "agree to disagree", "no consensus", "deadlock", "cannot agree",
+    "stuck", "impasse", "no progress", "going in circles"
+)
+
+# Agreement level parameters
+AGREEMENT_PHRASES = (
+    "agree", "consensus", "yes", "correct", "good point",
+    "that makes sense", "i agree", "we agree"
+)
+DISAGREEMENT_PHRASES = (
+    "disagree", "no", "wrong", "bad", "problem",
+    "issue", "concern", "dispute"
+)
+
+# Punctuation is replaced by spaces before splitting messages into tokens
+_PUNCT_TABLE = str.maketrans({char: " " for char in string.punctuation})
+
+# Signed weight of each category in the agreement score
+AGREEMENT_WEIGHTS = {"agreement": 1, "disagreement": -1}
+
+# Compiled once at import; answers every phrase question for a message in a single memoized scan
+PHRASE_MATCHER = PhraseMatcher({
+    "consensus": CONSENSUS_INDICATORS,
+    "consensus_reached": CONSENSUS_REACHED_MARKERS,
+    "stalemate": STALEMATE_PHRASES,
+    "agreement": AGREEMENT_PHRASES,
+    "disagreement": DISAGREEMENT_PHRASES
+})
+
+@lru_cache(maxsize=1024)
+def _classify_agreement(content_lower: str) -> int:
+    """
+    Classify lowercased message content as agreeing or disagreeing.
+    
+    Args:
+        content_lower: Lowercased message content
+        
+    Returns:
+        1 for agreement, -1 for disagreement, 0 if neither dominates
+    """
+    hits = PHRASE_MATCHER.find(content_lower, AGREEMENT_WEIGHTS)
+    score = sum(weight * len(hits[category]) for category, weight in AGREEMENT_WEIGHTS.items())
+    return (score > 0) - (score < 0)
+
 class ConversationState:
     """
     Enhanced conversation state tracking for infinite loop prevention and consensus detection.
     """
     
+    # Fixed attribute layout: no per-instance __dict__
+    __slots__ = (
+        "max_rounds", "stalemate_threshold", "last_consensus_attempt",
+        "repeated_topics", "agent_agreement_level", "conversation_start", "_start_ns", "last_message_ns",
+        "message_history", "agent_participation", "_topics_seen", "consensus_attempts",
+        "stalemate_detected", "repetition_threshold", "max_recent_messages", "repetition_window",
+        "_term_cache_key", "_term_cache_value"
+    )
+    
+    # Phrase tables are shared by all instances
+    consensus_indicators = CONSENSUS_INDICATORS
+    stalemate_phrases = STALEMATE_PHRASES
+    agreement_phrases = AGREEMENT_PHRASES
+    disagreement_phrases = DISAGREEMENT_PHRASES
+    topic_keywords = TOPIC_KEYWORDS
+    
     def __init__(self, max_rounds: int = None, stalemate_threshold: float = 0.3):
-        self.round_count = 0
-        self.max_rounds = max_rounds if max_rounds is not None else get_max_rounds()
+        self.max_rounds = max_rounds if max_rounds is not None else MAX_ROUNDS
         self.stalemate_threshold = stalemate_threshold
         self.last_consensus_attempt = 0
         self.repeated_topics = set()
         self.agent_agreement_level = 0.0
         self.conversation_start = datetime.now()
-        self.last_message_time = datetime.now()
-        self.message_history = []
+        self._start_ns = time.monotonic_ns()
+        self.last_message_ns = self._start_ns
         self.agent_participation = {}
-        self.topic_history = []
+        self._topics_seen = set()
         self.consensus_attempts = 0
         self.stalemate_detected = False
         
-        # Consensus detection parameters
-        self.consensus_indicators = [
-            "consensus reached", "consensus achieved", "agreed upon",
-            "final decision", "we have consensus", "consensus has been reached",
-            "let's finalize", "ready to move forward", "we should proceed",
-            "consensus reached:", "consensus_reached"
-        ]
-        
-        # Stalemate detection parameters
-        self.stalemate_phrases = [
-            "agree to disagree", "no consensus", "deadlock", "cannot agree",
-            "stuck", "impasse", "no progress", "going in circles"
-        ]
-        
         # Repetition detection parameters
         self.repetition_threshold = 0.7  # 70% similarity threshold
         self.max_recent_messages = 5
+        self.repetition_window = 10  # Messages compared via MinHash for circular discussion
+        
+        # Detectors only look at the tail, so history is bounded to the conversation's round limit
+        self.message_history = deque(maxlen=max(self.max_rounds, self.repetition_window, self.max_recent_messages))
+        
+        # should_terminate result for the current state
+        self._term_cache_key = None
+        self._term_cache_value = (False, "")
     
-    def increment_round(self):
-        """Increment the round counter."""
-        self.round_count += 1
+    def _recent_messages(self, count: int) -> List[Dict[str, Any]]:
+        """Return the last `count` message records, indexing from the end of the deque."""
+        history = self.message_history
+        return [history[i] for i in range(-min(count, len(history)), 0)]
+    
+    @property
+    def round_count(self) -> int:
+        """Number of rounds so far (one per message added)."""
+        return len(self.message_history)
     
     def add_message(self, message: Dict[str, Any], agent_name: str = None) -> None:
         """
@@ -59,36 +133,90 @@ class ConversationState:
             message: Message dictionary or string
             agent_name: Name of the agent who sent the message
         """
-        self.increment_round()
-        self.last_message_time = datetime.now()
+        self.last_message_ns = time.monotonic_ns()
+        self.message_history.append(self._build_record(message, agent_name, len(self.message_history) + 1))
+        self._term_cache_key = None
+        
+        # Track agent participation
+        if agent_name:
+            self.agent_participation[agent_name] = self.agent_participation.get(agent_name, 0) + 1
+        
+        logger.debug(f"Added message from {agent_name} (round {self.round_count})")
+    
+    def add_messages(self, messages: Iterable[Any], agent_name: str = None) -> None:
+        """
+        Add several messages from one agent at once.
+        
+        Equivalent to calling add_message for each message, but the batch
+        shares one timestamp, one history extend, one participation update
+        and one invalidation of the termination cache.
+        
+        Args:
+            messages: Message dictionaries or strings
+            agent_name: Name of the agent who sent the messages
+        """
+        self.last_message_ns = time.monotonic_ns()
+        history = self.message_history
+        start = len(history)
+        records = [
+            self._build_record(message, agent_name, min(start + i, history.maxlen) + 1)
+            for i, message in enumerate(messages)
+        ]
+        if not records:
+            return
+        
+        history.extend(records)
+        self._term_cache_key = None
         
+        # Track agent participation
+        if agent_name:
+            self.agent_participation[agent_name] = self.agent_participation.get(agent_name, 0) + len(records)
+        
+        logger.debug(f"Added {len(records)} messages from {agent_name} (round {self.round_count})")
+    
+    def _build_record(self, message: Any, agent_name: Optional[str], round_number: int) -> Dict[str, Any]:
+        """
+        Analyze one message into a history record, updating topics and agreement.
+        
+        Args:
+            message: Message dictionary or string
+            agent_name: Name of the agent who sent the message
+            round_number: Round the message is recorded as
+            
+        Returns:
+            Message record for the history
+        """
         # Extract message content
         if isinstance(message, dict):
             content = message.get("content", message.get("message", str(message)))
         else:
             content = str(message)
         
-        # Store message
+        # Lowercase once; every analyzer below and every detector reads this copy
+        content_lower = content.lower()
+        
+        # Store message (with its token set, MinHash signature and phrase hits, computed once)
+        hits = PHRASE_MATCHER.find(content_lower, ("consensus_reached", "stalemate"))
+        tokens = frozenset(content_lower.translate(_PUNCT_TABLE).split())
         message_record = {
             "content": content,
+            "content_lower": content_lower,
             "agent": agent_name,
-            "timestamp": datetime.now(),
-            "round": self.round_count
+            "ts_ns": self.last_message_ns,
+            "round": round_number,
+            "tokens": tokens,
+            "minhash": minhash_signature(tokens),
+            "consensus_hit": bool(hits["consensus_reached"]),
+            "stalemate_hits": hits["stalemate"]
         }
-        self.message_history.append(message_record)
-        
-        # Track agent participation
-        if agent_name:
-            self.agent_participation[agent_name] = self.agent_participation.get(agent_name, 0) + 1
         
         # Extract topics
-        topics = self.extract_topics(content)
-        self.topic_history.extend(topics)
+        self._topics_seen.update(extract_topics(content_lower))
         
         # Update agreement level
-        self.update_agreement_level(content)
+        self._shift_agreement(_classify_agreement(content_lower))
         
-        logger.debug(f"Added message from {agent_name} (round {self.round_count})")
+        return message_record
     
     def extract_topics(self, content: str) -> List[str]:
         """
@@ -100,24 +228,7 @@ class ConversationState:
         Returns:
             List of extracted topics
         """
-        # Simple topic extraction based on keywords
-        topics = []
-        content_lower = content.lower()
-        
-        # Common app development topics
-        topic_keywords = {
-            "user experience": ["ux", "user experience", "user interface", "ui"],
-            "technical": ["technical", "feasibility", "implementation", "architecture"],
-            "business": ["business", "value", "roi", "market"],
-            "quality": ["quality", "testing", "qa", "reliability"],
-            "design": ["design", "layout", "components", "wireframe"]
-        }
-        
-        for topic, keywords in topic_keywords.items():
-            if any(keyword in content_lower for keyword in keywords):
-                topics.append(topic)
-        
-        return topics
+        return list(extract_topics(content.lower()))
     
     def update_agreement_level(self, content: str) -> None:
         """
@@ -126,25 +237,13 @@ class ConversationState:
         Args:
             content: Message content
         """
-        content_lower = content.lower()
-        
-        # Check for agreement indicators
-        agreement_phrases = [
-            "agree", "consensus", "yes", "correct", "good point",
-            "that makes sense", "i agree", "we agree"
-        ]
-        
-        disagreement_phrases = [
-            "disagree", "no", "wrong", "bad", "problem",
-            "issue", "concern", "dispute"
-        ]
-        
-        agreement_count = sum(1 for phrase in agreement_phrases if phrase in content_lower)
-        disagreement_count = sum(1 for phrase in disagreement_phrases if phrase in content_lower)
-        
-        if agreement_count > disagreement_count:
+        self._shift_agreement(_classify_agreement(content.lower()))
+    
+    def _shift_agreement(self, direction: int) -> None:
+        """Move the agreement level one step in the given direction (+1, -1 or 0)."""
+        if direction > 0:
             self.agent_agreement_level = min(1.0, self.agent_agreement_level + 0.1)
-        elif disagreement_count > agreement_count:
+        elif direction < 0:
             self.agent_agreement_level = max(0.0, self.agent_agreement_level - 0.1)
     
     def detect_repetition(self) -> bool:
@@ -158,23 +257,32 @@ class ConversationState:
             return False
         
         # Check recent messages for similar content
-        recent_messages = self.message_history[-3:]
-        content_similarity = 0
-        
-        for i in range(len(recent_messages) - 1):
-            for j in range(i + 1, len(recent_messages)):
-                content1 = recent_messages[i]["content"].lower()
-                content2 = recent_messages[j]["content"].lower()
-                
-                # Simple similarity check
-                words1 = set(content1.split())
-                words2 = set(content2.split())
-                
-                if words1 and words2:
-                    similarity = len(words1.intersection(words2)) / len(words1.union(words2))
-                    content_similarity = max(content_similarity, similarity)
-        
-        return content_similarity > self.repetition_threshold
+        recent_messages = self._recent_messages(3)
+        
+        for msg1, msg2 in combinations(recent_messages, 2):
+            # Jaccard similarity of the cached token sets (union size derived, not built)
+            words1 = msg1["tokens"]
+            words2 = msg2["tokens"]
+            if not words1 or not words2:
+                continue
+            
+            # Similarity can never exceed the size ratio, so skip hashing pairs that cannot qualify
+            smaller, larger = sorted((len(words1), len(words2)))
+            if smaller <= self.repetition_threshold * larger:
+                continue
+            
+            common = len(words1 & words2)
+            if common / (smaller + larger - common) > self.repetition_threshold:
+                return True
+        
+        # Look further back for circular discussion using the cached signatures
+        if len(self.message_history) > len(recent_messages):
+            window = self._recent_messages(self.repetition_window)
+            for msg1, msg2 in combinations(window, 2):
+                if signature_similarity(msg1["minhash"], msg2["minhash"]) > self.repetition_threshold:
+                    return True
+        
+        return False
     
     def detect_stalemate(self) -> bool:
         """
@@ -186,12 +294,12 @@ class ConversationState:
         if len(self.message_history) < 5:
             return False
         
-        # Check for stalemate indicators in recent messages
-        recent_content = " ".join([msg["content"].lower() for msg in self.message_history[-5:]])
-        
-        stalemate_count = sum(1 for phrase in self.stalemate_phrases if phrase in recent_content)
+        # Distinct stalemate phrases across recent messages, from the hits recorded at insert time
+        stalemate_found = set()
+        for msg in self._recent_messages(5):
+            stalemate_found.update(msg["stalemate_hits"])
         
-        if stalemate_count >= 2:
+        if len(stalemate_found) >= 2:
             self.stalemate_detected = True
             return True
         
@@ -207,10 +315,10 @@ class ConversationState:
         if not self.message_history:
             return False
         
-        latest_content = self.message_history[-1]["content"].lower()
+        latest_content = self.message_history[-1]["content_lower"]
         
         # Check for consensus indicators
-        consensus_found = any(indicator in latest_content for indicator in self.consensus_indicators)
+        consensus_found = bool(PHRASE_MATCHER.find(latest_content, ("consensus",))["consensus"])
         
         if consensus_found:
             self.consensus_attempts += 1
@@ -218,26 +326,31 @@ class ConversationState:
         
         return consensus_found
     
-    def should_terminate(self, messages: List[Dict[str, Any]] = None) -> Tuple[bool, str]:
+    def should_terminate(self) -> Tuple[bool, str]:
         """
         Determine if the conversation should terminate.
         
-        Args:
-            messages: Optional list of messages to check
-            
+        The result is cached until the state changes, so orchestrators that
+        ask several times within a round do not rerun the detectors.
+        
         Returns:
             Tuple of (should_terminate, reason)
         """
+        cache_key = (self.round_count, self.consensus_attempts, self.max_rounds)
+        if self._term_cache_key != cache_key:
+            self._term_cache_value = self._evaluate_termination()
+            self._term_cache_key = cache_key
+        return self._term_cache_value
+    
+    def _evaluate_termination(self) -> Tuple[bool, str]:
+        """Run the termination checks, cheapest first."""
         # Check round limit
         if self.round_count >= self.max_rounds:
             return True, f"Maximum rounds ({self.max_rounds}) reached"
         
-        # Check for consensus reached
-        if messages:
-            for message in messages[-3:]:
-                content = message.get("content", "").lower()
-                if "consensus reached:" in content or "consensus_reached" in content:
-                    return True, "Consensus reached"
+        # Check for consensus reached (flagged on each message when it was added)
+        if any(msg["consensus_hit"] for msg in self._recent_messages(3)):
+            return True, "Consensus reached"
         
         # Check for stalemate
         if self.detect_stalemate():
@@ -260,34 +373,41 @@ class ConversationState:
         Returns:
             Dictionary containing conversation summary
         """
-        # Calculate actual round count from message history
-        actual_rounds = len(self.message_history) if self.message_history else 0
-        
         return {
-            "round_count": actual_rounds,
+            "round_count": self.round_count,
             "max_rounds": self.max_rounds,
             "consensus_attempts": self.consensus_attempts,
             "stalemate_detected": self.stalemate_detected,
             "agent_agreement_level": self.agent_agreement_level,
             "agent_participation": self.agent_participation,
-            "conversation_duration": str(datetime.now() - self.conversation_start),
-            "topics_discussed": list(set(self.topic_history))
+            "conversation_duration": str(timedelta(microseconds=(time.monotonic_ns() - self._start_ns) // 1000)),
+            "topics_discussed": list(self._topics_seen)
         }
     
     def reset(self) -> None:
         """Reset the conversation state."""
-        self.round_count = 0
         self.consensus_attempts = 0
         self.stalemate_detected = False
         self.agent_agreement_level = 0.0
         self.conversation_start = datetime.now()
-        self.last_message_time = datetime.now()
-        self.message_history = []
+        self._start_ns = time.monotonic_ns()
+        self.last_message_ns = self._start_ns
+        self.message_history = deque(maxlen=self.message_history.maxlen)
+        self._term_cache_key = None
         self.agent_participation = {}
-        self.topic_history = []
+        self._topics_seen = set()
+
+# Global conversation state instance, created on first access
+_conversation_state: Optional[ConversationState] = None
 
-# Global conversation state instance
-conversation_state = ConversationState()
+def __getattr__(name: str) -> Any:
+    """Lazily create the module-level `conversation_state` instance (PEP 562)."""
+    global _conversation_state
+    if name == "conversation_state":
+        if _conversation_state is None:
+            _conversation_state = ConversationState()
+        return _conversation_state
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     # Test conversation state
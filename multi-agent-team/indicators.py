@@ -0,0 +1,136 @@
+# indicators.py
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+# Common app development topics
+TOPIC_KEYWORDS = {
+    "user experience": ("ux", "user experience", "user interface", "ui"),
+    "technical": ("technical", "feasibility", "implementation", "architecture"),
+    "business": ("business", "value", "roi", "market"),
+    "quality": ("quality", "testing", "qa", "reliability"),
+    "design": ("design", "layout", "components", "wireframe")
+}
+
+def _whole_word_pattern(phrase: str) -> "re.Pattern[str]":
+    """
+    Compile a pattern matching the phrase only where it is not part of a longer word.
+    
+    Boundaries are only enforced on edges that are word characters, so
+    phrases ending in punctuation such as "consensus reached:" still match.
+    """
+    prefix = r"(?<!\w)" if re.match(r"\w", phrase[0]) else ""
+    suffix = r"(?!\w)" if re.match(r"\w", phrase[-1]) else ""
+    return re.compile(prefix + re.escape(phrase) + suffix)
+
+class PhraseMatcher:
+    """
+    Multi-category literal phrase matcher.
+
+    Every phrase is probed once per scan and each hit is tagged with all of
+    the categories it belongs to, so a single scan of a message answers the
+    positive/negative/neutral/consensus questions at once. Scans are memoized
+    per text, so detectors that re-analyze the same messages every round
+    share the work.
+
+    By default phrases only match as whole words, so "no" does not fire on
+    "know" or "note" and "ui" does not fire on "build".
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]], cache_size: int = 1024, whole_words: bool = True):
+        """
+        Build the matcher.
+
+        Args:
+            categories: Mapping of category name to the phrases in that category
+            cache_size: Number of distinct texts whose scan results are kept
+            whole_words: Require word boundaries around each phrase
+        """
+        self.categories = {name: tuple(dict.fromkeys(phrases)) for name, phrases in categories.items()}
+
+        phrase_categories: Dict[str, Tuple[str, ...]] = {}
+        for name, phrases in self.categories.items():
+            for phrase in phrases:
+                phrase_categories[phrase] = phrase_categories.get(phrase, ()) + (name,)
+        self._phrase_categories = phrase_categories
+
+        # Substring probes stay the fast filter; the boundary regex only runs on candidates
+        self._boundaries = {phrase: _whole_word_pattern(phrase) for phrase in phrase_categories} if whole_words else None
+        self._scan = lru_cache(maxsize=cache_size)(self._scan_uncached)
+
+    def _scan_uncached(self, text: str) -> Dict[str, FrozenSet[str]]:
+        """Scan the text for every phrase of every category."""
+        hits: Dict[str, Set[str]] = {name: set() for name in self.categories}
+        boundaries = self._boundaries
+        for phrase, names in self._phrase_categories.items():
+            if phrase in text and (boundaries is None or boundaries[phrase].search(text)):
+                for name in names:
+                    hits[name].add(phrase)
+        return {name: frozenset(found) for name, found in hits.items()}
+
+    def find(self, text: str, categories: Optional[Iterable[str]] = None) -> Dict[str, FrozenSet[str]]:
+        """
+        Find the phrases of every category that occur in the text.
+
+        Args:
+            text: Text to scan (callers pass lowercased content)
+            categories: Optional subset of categories to return
+
+        Returns:
+            Mapping of category name to the set of matched phrases
+        """
+        hits = self._scan(text)
+        if categories is None:
+            return dict(hits)
+        return {name: hits[name] for name in categories}
+
+    def counts(self, text: str, categories: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Count the distinct phrases of every category that occur in the text.
+
+        Args:
+            text: Text to scan (callers pass lowercased content)
+            categories: Optional subset of categories to return
+
+        Returns:
+            Mapping of category name to number of matched phrases
+        """
+        return {name: len(found) for name, found in self.find(text, categories).items()}
+
+TOPIC_MATCHER = PhraseMatcher(TOPIC_KEYWORDS)
+
+@lru_cache(maxsize=512)
+def extract_topics(content_lower: str) -> Tuple[str, ...]:
+    """
+    Extract the topics mentioned in lowercased message content.
+
+    Results are memoized because the same message is typically analyzed by
+    several detectors.
+
+    Args:
+        content_lower: Lowercased message content
+
+    Returns:
+        Tuple of topic names, in TOPIC_KEYWORDS order
+    """
+    hits = TOPIC_MATCHER.find(content_lower)
+    return tuple(topic for topic in TOPIC_KEYWORDS if hits[topic])
+
+# Phrases that mark a conversation as having reached consensus
+CONSENSUS_INDICATORS = (
+    "consensus reached:",
+    "consensus_reached",
+    "consensus achieved",
+    "we have consensus",
+    "consensus has been reached",
+    "final decision",
+    "agreed upon"
+)
+
+# Phrases of agents converging on a decision (counted as consensus attempts)
+CONSENSUS_ATTEMPT_INDICATORS = CONSENSUS_INDICATORS + (
+    "consensus reached", "let's finalize", "ready to move forward", "we should proceed"
+)
+
+# Shared matcher for the definitive consensus phrases
+CONSENSUS_MATCHER = PhraseMatcher({"consensus": CONSENSUS_INDICATORS})
@@ -5,20 +5,31 @@ Handles CLI interface, error handling, and result validation.
 """
 
 import argparse
+import asyncio
 import json
 import logging
+import re
 import sys
 import os
-from typing import Dict, Any, Optional
+import time
+from collections import OrderedDict
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
-# Import our modules
-from agents import create_agents, setup_group_chat
+try:
+    import orjson  # Optional: faster JSON encoding for results
+except ImportError:
+    orjson = None
+
+# Import our modules (agents and utils pull in AutoGen/jsonschema, so they are
+# imported inside the functions that use them and task-management commands
+# such as --list-tasks and --check-task skip that cost)
 from memory import memory_manager
-from utils import parse_user_input, extract_json_from_message, validate_wireframe
 from conversation_state import ConversationState
 from consensus import ConsensusDetector
 from config import validate_config
+from indicators import CONSENSUS_MATCHER
 
 # Configure logging
 logging.basicConfig(
@@ -27,19 +38,441 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def write_json_file(path: str, data: Any) -> None:
+    """
+    Write data as indented JSON to a file in a single write.
+    
+    The document is encoded to bytes first and written unbuffered, so the
+    file gets one write call rather than the text layer's chunked writes.
+    
+    Args:
+        path: Output file path
+        data: JSON-serializable data
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(data, indent=2).encode("utf-8")
+    
+    with open(path, "wb", buffering=0) as f:
+        f.write(payload)
+
+def write_json_stdout(data: Any) -> None:
+    """
+    Write data as JSON to stdout in a single write.
+    
+    Output is indented for a terminal and kept on one line when stdout is
+    redirected, which is smaller and what downstream tools parse.
+    
+    Args:
+        data: JSON-serializable data
+    """
+    pretty = sys.stdout.isatty()
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    elif pretty:
+        payload = json.dumps(data, indent=2).encode("utf-8")
+    else:
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        # Text-only streams (e.g. captured output)
+        print(payload.decode("utf-8"))
+        return
+    
+    # Flush pending text first so the JSON lands in order
+    sys.stdout.flush()
+    buffer.write(payload + b"\n")
+    buffer.flush()
+
+def canonical_json(data: Any) -> bytes:
+    """
+    Serialize data compactly with sorted keys, so equal data gives equal bytes.
+    
+    Args:
+        data: JSON-serializable data
+        
+    Returns:
+        Canonical JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+# Validation errors that report consensus despite a missing wireframe
+CONSENSUS_ERROR_PATTERN = re.compile(
+    r"consensus (?:reached|achieved|has been reached)|we have consensus", re.IGNORECASE
+)
+
+# Marker Max puts at the start of the message carrying the final wireframe
+CONSENSUS_MARKER = "CONSENSUS REACHED:"
+CONSENSUS_MARKER_WINDOW = 256  # Leading characters searched for the marker
+# The marker (case-sensitive) or any casing of "wireframe", found in a single scan
+WIREFRAME_PATTERN = re.compile(re.escape(CONSENSUS_MARKER) + r"|(?i:wireframe)")
+
+def mentions_wireframe(content: str) -> bool:
+    """
+    Check whether message content looks like it carries a wireframe.
+    
+    Args:
+        content: Message content
+        
+    Returns:
+        True if the content has the consensus marker or mentions a wireframe
+    """
+    return WIREFRAME_PATTERN.search(content) is not None
+
+def find_wireframe(messages: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Find the most recent wireframe JSON in a stored conversation.
+    
+    Messages opening with the consensus marker are tried first, newest
+    first; the broader scan over messages that merely mention a wireframe
+    only runs if none of them yields JSON.
+    
+    Args:
+        messages: Stored conversation messages
+        
+    Returns:
+        Wireframe dictionary, or None if none was found
+    """
+    from utils import extract_json_from_message
+    
+    contents = [
+        message['content'] for message in reversed(messages)
+        if isinstance(message, dict) and 'content' in message
+    ]
+    
+    # Pass 1: the definitive consensus turn
+    tried = set()
+    for index, content in enumerate(contents):
+        if CONSENSUS_MARKER in content[:CONSENSUS_MARKER_WINDOW]:
+            tried.add(index)
+            wireframe = extract_json_from_message(content)
+            if wireframe:
+                return wireframe
+    
+    # Pass 2: any other message that mentions a wireframe
+    for index, content in enumerate(contents):
+        if index not in tried and mentions_wireframe(content):
+            wireframe = extract_json_from_message(content)
+            if wireframe:
+                return wireframe
+    
+    return None
+
+# Opening message for a wireframe discussion, filled from the parsed user input
+INITIAL_MESSAGE_TEMPLATE = (
+    "App Idea/MVP: {idea_mvp}\n"
+    "User Personas: {personas}\n"
+    "Desired Outcomes: {outcomes}\n"
+    "Discuss critically: user journeys, JTBD, minimum must-haves vs. extras. "
+    "Iterate until consensus on screens/components. "
+    "Max: Output final wireframe as JSON when consensus is reached."
+)
+
+# Sample idea used by --test
+TEST_INPUT = "* Simple todo app. MVP: Add/edit tasks. * Busy mom (35). * Add task, view list."
+
+@lru_cache(maxsize=1)
+def prepared_test_query() -> Tuple[Dict[str, str], str]:
+    """
+    Parse the --test input and build its initial message, once per process.
+    
+    Returns:
+        Tuple of (parsed_input, initial_message)
+    """
+    from utils import parse_user_input
+    
+    parsed_input = parse_user_input(TEST_INPUT)
+    return parsed_input, INITIAL_MESSAGE_TEMPLATE.format_map(parsed_input)
+
+# Number of tasks whose agents are kept alive between runs
+AGENT_CACHE_SIZE = 16
+
+# Number of wireframe validation results remembered
+VALIDATION_CACHE_SIZE = 64
+
+def consensus_in_recent_messages(messages: List[Dict[str, Any]], window: int = 5) -> bool:
+    """
+    Check whether any of the last messages carries a consensus indicator.
+    
+    Each message is lowercased and scanned whole, since "CONSENSUS REACHED:"
+    usually opens a turn that continues with a multi-KB wireframe JSON.
+    Messages are checked newest first, stopping at the first hit.
+    
+    Args:
+        messages: Conversation messages
+        window: Number of most recent messages to check
+        
+    Returns:
+        True if consensus was reached
+    """
+    for msg in reversed(messages[-window:]):
+        if CONSENSUS_MATCHER.find(msg.get("content", "").lower())["consensus"]:
+            return True
+    return False
+
+class TranscriptRecorder:
+    """
+    Collects conversation messages as agents send them.
+    
+    Messages are appended as each turn completes (via AutoGen's
+    process_message_before_send hook) instead of being rebuilt from
+    chat_history after the chat ends, and handed to an optional persist
+    callback so the conversation is saved incrementally. Timestamps have
+    second precision and are formatted at most once per second, so a
+    batch of messages (e.g. the chat_history fallback) shares one string.
+    """
+    
+    def __init__(self, persist: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Create a recorder.
+        
+        Args:
+            persist: Optional callback invoked with each recorded message
+        """
+        self.messages = []
+        self.persist = persist
+        self._timestamp = ""
+        self._timestamp_second = None
+    
+    def attach(self, agents: List[Any]) -> None:
+        """
+        Register the recorder on every agent that can send messages.
+        
+        Args:
+            agents: Agents taking part in the conversation
+        """
+        for agent in agents:
+            agent.register_hook("process_message_before_send", self._on_send)
+    
+    def reset(self) -> None:
+        """Start a new transcript (the recorder stays attached to its agents)."""
+        self.messages = []
+    
+    def _current_timestamp(self) -> str:
+        """Return the current ISO timestamp (second precision), formatted once per wall-clock second."""
+        second = time.time_ns() // 1_000_000_000
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp = datetime.fromtimestamp(second).isoformat(timespec="seconds")
+        return self._timestamp
+    
+    def _record(self, message: Any, agent_name: str) -> None:
+        """Append a message to the transcript."""
+        if isinstance(message, dict):
+            content = message.get("content", message.get("message", ""))
+        else:
+            content = str(message)
+        
+        record = {
+            "content": content,
+            "agent": agent_name,
+            "timestamp": self._current_timestamp()
+        }
+        self.messages.append(record)
+        
+        if self.persist is not None:
+            try:
+                self.persist(record)
+            except Exception as e:
+                # Never let a storage problem interrupt the conversation
+                logger.error(f"Error persisting message: {e}")
+    
+    def _on_send(self, sender: Any, message: Any, recipient: Any, silent: bool) -> Any:
+        """Record a message on its way out; the message itself is passed through unchanged."""
+        self._record(message, getattr(sender, "name", "Unknown"))
+        return message
+    
+    def finish(self, chat_result: Any) -> List[Dict[str, Any]]:
+        """
+        Return the recorded transcript.
+        
+        Falls back to the chat result's history when nothing was recorded
+        (e.g. agents without hook support).
+        
+        Args:
+            chat_result: AutoGen chat result
+            
+        Returns:
+            List of message dictionaries with content, agent and timestamp
+        """
+        if not self.messages:
+            for msg in chat_result.chat_history:
+                self._record(msg, msg.get("name", "Unknown") if isinstance(msg, dict) else "Unknown")
+        return self.messages
+
+class _Sink:
+    """
+    Receives progress updates from a query run.
+    
+    run_query reports through a logger and the interactive mode prints
+    staged progress; both drive the same pipeline through this interface.
+    """
+    
+    def stage(self, number: int, icon: str, text: str) -> None:
+        """Announce the start of a pipeline stage."""
+    
+    def info(self, text: str, icon: str = "") -> None:
+        """Report a noteworthy fact about the run."""
+    
+    def detail(self, text: str) -> None:
+        """Report progress chatter that is only useful interactively."""
+    
+    def ok(self, text: str) -> None:
+        """Report a completed step."""
+    
+    def warn(self, text: str) -> None:
+        """Report a problem that does not abort the run."""
+    
+    def flush(self) -> None:
+        """Emit any buffered updates."""
+
+class _LoggerSink(_Sink):
+    """Sends progress updates to the module logger."""
+    
+    def stage(self, number: int, icon: str, text: str) -> None:
+        logger.info(text)
+    
+    def info(self, text: str, icon: str = "") -> None:
+        logger.info(text)
+    
+    def detail(self, text: str) -> None:
+        logger.debug(text)
+    
+    def ok(self, text: str) -> None:
+        logger.info(text)
+    
+    def warn(self, text: str) -> None:
+        logger.warning(text)
+
+class _PrintSink(_Sink):
+    """
+    Prints staged progress updates for interactive use.
+    
+    Lines are buffered and written with a single write and flush per
+    stage (and before the long-running chat), instead of one line-buffered
+    print per update.
+    """
+    
+    STAGE_COUNT = 6
+    
+    def __init__(self):
+        self._lines = []
+    
+    def stage(self, number: int, icon: str, text: str) -> None:
+        self.flush()
+        prefix = "\n" if number > 1 else ""
+        self._lines.append(f"{prefix}{icon} Stage {number}/{self.STAGE_COUNT}: {text}")
+    
+    def info(self, text: str, icon: str = "") -> None:
+        self._lines.append(f"   {icon} {text}" if icon else f"   {text}")
+    
+    def detail(self, text: str) -> None:
+        self._lines.append(f"   {text}")
+    
+    def ok(self, text: str) -> None:
+        self._lines.append(f"   ✅ {text}")
+    
+    def warn(self, text: str) -> None:
+        self._lines.append(f"   ⚠️  {text}")
+    
+    def flush(self) -> None:
+        if self._lines:
+            sys.stdout.write("\n".join(self._lines) + "\n")
+            sys.stdout.flush()
+            self._lines.clear()
+
 class MultiAgentTeam:
     """
     Main application class for the multi-agent team system.
     """
     
-    def __init__(self):
+    def __init__(self, async_chat: bool = False):
+        """
+        Create the application.
+        
+        Args:
+            async_chat: Run the opening critique round concurrently (fan-out)
+        """
+        self.async_chat = async_chat
         self.conversation_state = ConversationState()
         self.consensus_detector = ConsensusDetector()
+        self._agent_cache = OrderedDict()  # task_id -> (agents, manager, recorder)
+        self._wireframe_cache = {}  # task_id -> (message_count, wireframe, {screen_id: screen})
+        self._validation_cache = OrderedDict()  # canonical JSON -> (is_valid, error)
+    
+    def _get_agents(self, task_id: str) -> Tuple[Tuple[Any, ...], Any, TranscriptRecorder]:
+        """
+        Get the agents, group chat manager and transcript recorder for a task.
+        
+        Building AutoGen agents re-creates their LLM clients, so they are
+        cached per task ID (least recently used first out) and reused by
+        later queries and screen development runs on the same task. A reused
+        team gets its previous-context prompt and round limit rebuilt from
+        current memory.
+        
+        Args:
+            task_id: Unique identifier for the task
+            
+        Returns:
+            Tuple of (agent bundle, manager, recorder); the recorder is reset
+        """
+        from agents import create_agents, refresh_agent_context, refresh_group_chat, setup_group_chat
+        
+        cached = self._agent_cache.get(task_id)
+        if cached is None:
+            agents = create_agents(task_id, self.conversation_state)
+            manager = setup_group_chat(agents, task_id, self.conversation_state)
+            recorder = TranscriptRecorder(persist=partial(memory_manager.buffer_message, task_id))
+            recorder.attach(agents)
+            cached = (agents, manager, recorder)
+            self._agent_cache[task_id] = cached
+            if len(self._agent_cache) > AGENT_CACHE_SIZE:
+                self._agent_cache.popitem(last=False)
+        else:
+            self._agent_cache.move_to_end(task_id)
+            # The agents' previous-context prompt and the chat's round limit are
+            # snapshots of the task's history from when they were built
+            refresh_agent_context(cached[0], task_id)
+            refresh_group_chat(cached[1], task_id)
+        
+        cached[2].reset()
+        return cached
+    
+    def _validate_wireframe(self, wireframe_json: Dict[str, Any]) -> Tuple[bool, str]:
+        """
+        Validate a wireframe, reusing the result for identical JSON.
+        
+        Schema validation is pure, so results are cached (least recently
+        used first out) by the wireframe's canonical serialization.
+        
+        Args:
+            wireframe_json: Wireframe JSON to validate
+            
+        Returns:
+            Tuple of (is_valid, error_message)
+        """
+        key = canonical_json(wireframe_json)
+        cached = self._validation_cache.get(key)
+        if cached is None:
+            from utils import validate_wireframe
+            cached = validate_wireframe(wireframe_json)
+            self._validation_cache[key] = cached
+            if len(self._validation_cache) > VALIDATION_CACHE_SIZE:
+                self._validation_cache.popitem(last=False)
+        else:
+            self._validation_cache.move_to_end(key)
+        return cached
     
     def run_query(self, input_text: str, task_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Run a query through the multi-agent team.
         
+        Synchronous wrapper around run_query_async for CLI and test callers.
+        
         Args:
             input_text: User input text
             task_id: Optional task ID (will be generated if not provided)
@@ -47,87 +480,126 @@ class MultiAgentTeam:
         Returns:
             Dictionary containing the result and metadata
         """
+        return asyncio.run(self.run_query_async(input_text, task_id))
+    
+    async def run_query_async(self, input_text: str, task_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Run a query through the multi-agent team without blocking the event loop.
+        
+        LLM round-trips are awaited via AutoGen's async chat API, so several
+        queries can share one event loop and overlap their network latency.
+        
+        Args:
+            input_text: User input text
+            task_id: Optional task ID (will be generated if not provided)
+            
+        Returns:
+            Dictionary containing the result and metadata
+        """
+        return await self._run_query_core(input_text, task_id, _LoggerSink())
+    
+    async def _run_query_core(
+        self,
+        input_text: str,
+        task_id: Optional[str],
+        sink: _Sink,
+        prepared: Optional[Tuple[Dict[str, str], str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the query pipeline, reporting progress to a sink.
+        
+        Args:
+            input_text: User input text
+            task_id: Optional task ID (will be generated if not provided)
+            sink: Receiver of progress updates
+            prepared: Optional (parsed_input, initial_message) that skips parsing and formatting
+            
+        Returns:
+            Dictionary containing the result and metadata
+        """
+        from agents import a_run_group_chat
+        from utils import parse_user_input, extract_json_from_message
+        
         try:
-            # Parse user input
-            logger.info("Parsing user input...")
-            parsed_input = parse_user_input(input_text)
+            # Stage 1: Parse user input
+            sink.stage(1, "📝", "Parsing user input...")
+            if prepared is None:
+                parsed_input = parse_user_input(input_text)
+                initial_message = None
+            else:
+                parsed_input, initial_message = prepared
+            sink.ok(f"Parsed: {parsed_input['idea_mvp'][:50]}...")
             
             # Generate task ID if not provided
             if not task_id:
                 task_id = memory_manager.generate_task_id(parsed_input["idea_mvp"])
             
-            logger.info(f"Task ID: {task_id}")
+            sink.info(f"Task ID: {task_id}", "🆔")
             
-            # Create initial message
-            initial_message = (
-                f"App Idea/MVP: {parsed_input['idea_mvp']}\n"
-                f"User Personas: {parsed_input['personas']}\n"
-                f"Desired Outcomes: {parsed_input['outcomes']}\n"
-                "Discuss critically: user journeys, JTBD, minimum must-haves vs. extras. "
-                "Iterate until consensus on screens/components. "
-                "Max: Output final wireframe as JSON when consensus is reached."
-            )
+            # Stage 2: Create initial message
+            sink.stage(2, "💬", "Preparing conversation...")
+            if initial_message is None:
+                initial_message = INITIAL_MESSAGE_TEMPLATE.format_map(parsed_input)
+            sink.ok("Initial message prepared")
+            
+            # Stage 3: Create (or reuse) agents
+            sink.stage(3, "🤖", "Creating agents...")
+            agents, manager, recorder = self._get_agents(task_id)
+            sink.ok(f"Created {len(agents)} agents:")
+            for agent in agents.others:
+                sink.detail(f"   - {agent.name}")
             
-            # Create agents and conversation state
-            logger.info("Creating agents...")
-            agents = create_agents(task_id, self.conversation_state)
+            # Stage 4: Setup group chat
+            sink.stage(4, "💭", "Setting up group chat...")
+            sink.ok("Group chat configured")
             
-            # Setup group chat
-            logger.info("Setting up group chat...")
-            manager = setup_group_chat(agents, task_id, self.conversation_state)
+            # Stage 5: Start conversation
+            sink.stage(5, "🎯", "Starting conversation...")
+            sink.detail("🔄 Agents are discussing your app idea...")
+            sink.detail("⏳ This may take 1-3 minutes depending on complexity...")
+            sink.detail("📊 Conversation progress:")
+            sink.detail("=" * 50)
             
-            # Start conversation
-            logger.info("Starting conversation...")
-            user_proxy = agents[0]  # Admin agent
-            chat_result = user_proxy.initiate_chat(manager, message=initial_message)
+            sink.flush()
             
-            # Extract messages
-            messages = []
-            for msg in chat_result.chat_history:
-                if isinstance(msg, dict):
-                    content = msg.get("content", msg.get("message", ""))
-                    agent = msg.get("name", "Unknown")
-                else:
-                    content = str(msg)
-                    agent = "Unknown"
-                
-                messages.append({
-                    "content": content,
-                    "agent": agent,
-                    "timestamp": str(datetime.now())
-                })
+            chat_result = await a_run_group_chat(agents, manager, initial_message, fanout=self.async_chat)
+            
+            sink.detail("=" * 50)
+            sink.ok("Conversation completed")
+            
+            # Stage 6: Process results
+            sink.stage(6, "📊", "Processing results...")
             
-            # Save conversation
-            memory_manager.save_conversation(task_id, messages)
+            # Collect messages recorded during the chat
+            messages = recorder.finish(chat_result)
+            memory_manager.flush()
+            sink.info(f"Processed {len(messages)} messages", "📝")
+            
+            # Messages were buffered into memory as they were sent
+            sink.detail("💾 Conversation saved to memory")
             
             # Extract JSON from final message
             final_message = messages[-1]["content"] if messages else ""
             wireframe_json = extract_json_from_message(final_message)
             
             # Check for consensus reached in the conversation
-            consensus_reached = False
-            for msg in messages[-5:]:  # Check last 5 messages for better coverage
-                content = msg.get("content", "").lower()
-                if any(indicator in content for indicator in [
-                    "consensus reached:", 
-                    "consensus_reached", 
-                    "consensus achieved",
-                    "we have consensus",
-                    "consensus has been reached",
-                    "final decision",
-                    "agreed upon"
-                ]):
-                    consensus_reached = True
-                    break
+            consensus_reached = consensus_in_recent_messages(messages)
             
             # Validate wireframe if found
             validation_result = {"is_valid": False, "error": "No JSON found in output"}
             if wireframe_json:
-                is_valid, error = validate_wireframe(wireframe_json)
+                is_valid, error = self._validate_wireframe(wireframe_json)
                 validation_result = {"is_valid": is_valid, "error": error}
                 
-                if not is_valid:
-                    logger.warning(f"Wireframe validation failed: {error}")
+                if is_valid:
+                    sink.ok("Valid wireframe JSON generated")
+                else:
+                    sink.warn(f"Wireframe validation failed: {error}")
+            elif consensus_reached:
+                sink.warn("Consensus reached but JSON extraction failed")
+                validation_result = {"is_valid": False, "error": "Consensus reached but JSON extraction failed"}
+            else:
+                sink.warn("No JSON wireframe found in output")
             
             # Prepare result
             result = {
@@ -141,12 +613,14 @@ class MultiAgentTeam:
                 "timestamp": str(datetime.now())
             }
             
-            logger.info(f"Query completed successfully. Messages: {len(messages)}")
+            sink.ok("Results processed successfully")
             return result
             
         except Exception as e:
             logger.error(f"Error running query: {e}")
             raise
+        finally:
+            sink.flush()
     
     def run_interactive(self):
         """
@@ -188,145 +662,24 @@ class MultiAgentTeam:
                 print(f"\n❌ Error: {e}")
                 print("Please try again.")
     
-    def run_query_with_progress(self, input_text: str, task_id: Optional[str] = None) -> Dict[str, Any]:
+    def run_query_with_progress(
+        self,
+        input_text: str,
+        task_id: Optional[str] = None,
+        prepared: Optional[Tuple[Dict[str, str], str]] = None
+    ) -> Dict[str, Any]:
         """
         Run a query with clean progress updates and better conversation flow.
         
         Args:
             input_text: User input text
             task_id: Optional task ID (will be generated if not provided)
+            prepared: Optional (parsed_input, initial_message), e.g. from prepared_test_query
             
         Returns:
             Dictionary containing the result and metadata
         """
-        try:
-            # Stage 1: Parse user input
-            print("📝 Stage 1/6: Parsing user input...")
-            parsed_input = parse_user_input(input_text)
-            print(f"   ✅ Parsed: {parsed_input['idea_mvp'][:50]}...")
-            
-            # Generate task ID if not provided
-            if not task_id:
-                task_id = memory_manager.generate_task_id(parsed_input["idea_mvp"])
-            
-            print(f"   🆔 Task ID: {task_id}")
-            
-            # Stage 2: Create initial message
-            print("\n💬 Stage 2/6: Preparing conversation...")
-            initial_message = (
-                f"App Idea/MVP: {parsed_input['idea_mvp']}\n"
-                f"User Personas: {parsed_input['personas']}\n"
-                f"Desired Outcomes: {parsed_input['outcomes']}\n"
-                "Discuss critically: user journeys, JTBD, minimum must-haves vs. extras. "
-                "Iterate until consensus on screens/components. "
-                "Max: Output final wireframe as JSON when consensus is reached."
-            )
-            print("   ✅ Initial message prepared")
-            
-            # Stage 3: Create agents
-            print("\n🤖 Stage 3/6: Creating agents...")
-            agents = create_agents(task_id, self.conversation_state)
-            print(f"   ✅ Created {len(agents)} agents:")
-            for agent in agents[1:]:  # Skip Admin agent
-                print(f"      - {agent.name}")
-            
-            # Stage 4: Setup group chat
-            print("\n💭 Stage 4/6: Setting up group chat...")
-            manager = setup_group_chat(agents, task_id, self.conversation_state)
-            print("   ✅ Group chat configured")
-            
-            # Stage 5: Start conversation (CLEAN VERSION)
-            print("\n🎯 Stage 5/6: Starting conversation...")
-            print("   🔄 Agents are discussing your app idea...")
-            print("   ⏳ This may take 1-3 minutes depending on complexity...")
-            print("   📊 Conversation progress:")
-            print("   " + "="*50)
-            
-            # Start conversation without progress animation
-            user_proxy = agents[0]  # Admin agent
-            chat_result = user_proxy.initiate_chat(manager, message=initial_message)
-            
-            print("   " + "="*50)
-            print("   ✅ Conversation completed")
-            
-            # Stage 6: Process results
-            print("\n📊 Stage 6/6: Processing results...")
-            
-            # Extract messages
-            messages = []
-            for msg in chat_result.chat_history:
-                if isinstance(msg, dict):
-                    content = msg.get("content", msg.get("message", ""))
-                    agent = msg.get("name", "Unknown")
-                else:
-                    content = str(msg)
-                    agent = "Unknown"
-                
-                messages.append({
-                    "content": content,
-                    "agent": agent,
-                    "timestamp": str(datetime.now())
-                })
-            
-            print(f"   📝 Processed {len(messages)} messages")
-            
-            # Save conversation
-            memory_manager.save_conversation(task_id, messages)
-            print("   💾 Conversation saved to memory")
-            
-            # Extract JSON from final message
-            final_message = messages[-1]["content"] if messages else ""
-            wireframe_json = extract_json_from_message(final_message)
-            
-            # Check for consensus reached in the conversation
-            consensus_reached = False
-            for msg in messages[-5:]:  # Check last 5 messages for better coverage
-                content = msg.get("content", "").lower()
-                if any(indicator in content for indicator in [
-                    "consensus reached:", 
-                    "consensus_reached", 
-                    "consensus achieved",
-                    "we have consensus",
-                    "consensus has been reached",
-                    "final decision",
-                    "agreed upon"
-                ]):
-                    consensus_reached = True
-                    break
-            
-            # Validate wireframe if found
-            validation_result = {"is_valid": False, "error": "No JSON found in output"}
-            if wireframe_json:
-                is_valid, error = validate_wireframe(wireframe_json)
-                validation_result = {"is_valid": is_valid, "error": error}
-                
-                if is_valid:
-                    print("   ✅ Valid wireframe JSON generated")
-                else:
-                    print(f"   ⚠️  Wireframe validation failed: {error}")
-            elif consensus_reached:
-                print("   ⚠️  Consensus reached but JSON extraction failed")
-                validation_result = {"is_valid": False, "error": "Consensus reached but JSON extraction failed"}
-            else:
-                print("   ⚠️  No JSON wireframe found in output")
-            
-            # Prepare result
-            result = {
-                "task_id": task_id,
-                "input": parsed_input,
-                "wireframe": wireframe_json if validation_result["is_valid"] else None,
-                "validation": validation_result,
-                "conversation_summary": self.conversation_state.get_conversation_summary(),
-                "messages_count": len(messages),
-                "timestamp": str(datetime.now())
-            }
-            
-            print("   ✅ Results processed successfully")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error running query: {e}")
-            raise
+        return asyncio.run(self._run_query_core(input_text, task_id, _PrintSink(), prepared))
     
     def display_result(self, result: Dict[str, Any]):
         """
@@ -342,27 +695,17 @@ class MultiAgentTeam:
         print(f"Task ID: {result['task_id']}")
         print(f"Messages processed: {result['messages_count']}")
         
-        # Check for consensus reached
-        consensus_reached = False
-        if result['wireframe']:
-            consensus_reached = True
-        else:
-            # Check if consensus was reached but JSON extraction failed
-            validation_error = result['validation'].get('error', '')
-            if any(indicator in validation_error.lower() for indicator in [
-                'consensus reached', 
-                'consensus achieved',
-                'we have consensus',
-                'consensus has been reached'
-            ]):
-                consensus_reached = True
+        # Check for consensus reached (or reached but JSON extraction failed)
+        consensus_reached = bool(result['wireframe']) or bool(
+            CONSENSUS_ERROR_PATTERN.search(result['validation'].get('error') or '')
+        )
         
         print(f"Consensus reached: {'✅ Yes' if consensus_reached else '❌ No'}")
         
         if result['wireframe']:
             print("\n🎯 WIREFRAME GENERATED")
             print("-" * 30)
-            print(json.dumps(result['wireframe'], indent=2))
+            write_json_stdout(result['wireframe'])
         else:
             print(f"\n⚠️  No valid wireframe generated")
             if result['validation']['error']:
@@ -422,6 +765,9 @@ class MultiAgentTeam:
         Returns:
             Dictionary containing the screen development result and metadata
         """
+        from agents import a_run_group_chat
+        from utils import extract_json_from_message
+        
         try:
             print(f"📝 Stage 1/4: Loading existing wireframe for task {task_id}...")
             
@@ -432,34 +778,28 @@ class MultiAgentTeam:
             
             print(f"   ✅ Loaded {len(existing_messages)} existing messages")
             
-            # Extract wireframe from existing conversation
-            wireframe = None
-            for message in reversed(existing_messages):
-                if isinstance(message, dict) and 'content' in message:
-                    content = message['content']
-                    if 'CONSENSUS REACHED:' in content or 'wireframe' in content.lower():
-                        wireframe = extract_json_from_message(content)
-                        if wireframe:
-                            break
-            
-            if not wireframe:
-                raise ValueError(f"No wireframe found in conversation for task ID: {task_id}")
+            # Extract wireframe and its screen index (reused while the conversation is unchanged)
+            cached = self._wireframe_cache.get(task_id)
+            if cached is not None and cached[0] == len(existing_messages):
+                wireframe, screen_index = cached[1], cached[2]
+            else:
+                wireframe = find_wireframe(existing_messages)
+                if not wireframe:
+                    raise ValueError(f"No wireframe found in conversation for task ID: {task_id}")
+                screen_index = {
+                    s['screen_id']: s
+                    for s in wireframe.get('app', {}).get('screens', [])
+                    if isinstance(s, dict) and 'screen_id' in s
+                }
+                self._wireframe_cache[task_id] = (len(existing_messages), wireframe, screen_index)
             
             print(f"   ✅ Found existing wireframe")
             
             # Find the specific screen
-            screen = None
-            if 'app' in wireframe and 'screens' in wireframe['app']:
-                for s in wireframe['app']['screens']:
-                    if s.get('screen_id') == screen_id:
-                        screen = s
-                        break
+            screen = screen_index.get(screen_id)
             
             if not screen:
-                available_screens = []
-                if 'app' in wireframe and 'screens' in wireframe['app']:
-                    available_screens = [s.get('screen_id', 'unknown') for s in wireframe['app']['screens']]
-                raise ValueError(f"Screen '{screen_id}' not found. Available screens: {available_screens}")
+                raise ValueError(f"Screen '{screen_id}' not found. Available screens: {list(screen_index)}")
             
             print(f"   ✅ Found screen: {screen.get('name', screen_id)}")
             
@@ -489,36 +829,20 @@ class MultiAgentTeam:
             
             # Stage 3: Create agents for screen development
             print(f"\n🤖 Stage 3/4: Creating agents for screen development...")
-            agents = create_agents(task_id, self.conversation_state)
+            agents, manager, recorder = self._get_agents(task_id)
             print(f"   ✅ Created {len(agents)} agents")
             
             # Stage 4: Setup group chat and start conversation
             print(f"\n💭 Stage 4/4: Starting screen development conversation...")
-            manager = setup_group_chat(agents, task_id, self.conversation_state)
+            chat_result = asyncio.run(a_run_group_chat(agents, manager, initial_message))
             
-            user_proxy = agents[0]  # Admin agent
-            chat_result = user_proxy.initiate_chat(manager, message=initial_message)
-            
-            # Extract messages
-            messages = []
-            for msg in chat_result.chat_history:
-                if isinstance(msg, dict):
-                    content = msg.get("content", msg.get("message", ""))
-                    agent = msg.get("name", "Unknown")
-                else:
-                    content = str(msg)
-                    agent = "Unknown"
-                
-                messages.append({
-                    "content": content,
-                    "agent": agent,
-                    "timestamp": str(datetime.now())
-                })
+            # Collect messages recorded during the chat
+            messages = recorder.finish(chat_result)
+            memory_manager.flush()
             
             print(f"   ✅ Processed {len(messages)} messages")
             
-            # Save conversation
-            memory_manager.save_conversation(task_id, messages)
+            # Messages were buffered into memory as they were sent
             print("   💾 Conversation saved to memory")
             
             # Extract JSON from final message
@@ -529,7 +853,7 @@ class MultiAgentTeam:
             is_valid = False
             error = None
             if screen_development_json:
-                is_valid, error = validate_wireframe(screen_development_json)
+                is_valid, error = self._validate_wireframe(screen_development_json)
             
             # Prepare result
             result = {
@@ -621,6 +945,12 @@ Examples:
         help="Enable verbose logging"
     )
     
+    parser.add_argument(
+        "--async-chat",
+        action="store_true",
+        help="Collect the opening critiques from all agents concurrently"
+    )
+    
     # Screen development command
     parser.add_argument(
         "--screen-dev",
@@ -673,14 +1003,13 @@ Examples:
         sys.exit(1)
     
     # Create application instance
-    app = MultiAgentTeam()
+    app = MultiAgentTeam(async_chat=args.async_chat)
     
     try:
         if args.test:
             # Run with test data
-            test_input = "* Simple todo app. MVP: Add/edit tasks. * Busy mom (35). * Add task, view list."
-            print(f"🧪 Running with test data: {test_input}")
-            result = app.run_query_with_progress(test_input)
+            print(f"🧪 Running with test data: {TEST_INPUT}")
+            result = app.run_query_with_progress(TEST_INPUT, prepared=prepared_test_query())
             app.display_result(result)
             
         elif args.interactive:
@@ -695,8 +1024,7 @@ Examples:
             
             # Save to file if requested
             if args.output:
-                with open(args.output, 'w') as f:
-                    json.dump(result, f, indent=2)
+                write_json_file(args.output, result)
                 print(f"\n💾 Result saved to: {args.output}")
                 
         elif args.screen_dev:
@@ -712,14 +1040,13 @@ Examples:
             
             # Save to file if requested
             if args.output:
-                with open(args.output, 'w') as f:
-                    json.dump(result, f, indent=2)
+                write_json_file(args.output, result)
                 print(f"\n💾 Result saved to: {args.output}")
                 
         elif args.list_tasks:
             # List all tasks
             print("📋 Listing all available tasks...")
-            tasks = memory_manager.list_tasks()
+            tasks = memory_manager.get_task_overview()
             
             if not tasks:
                 print("❌ No tasks found in memory.")
@@ -727,15 +1054,13 @@ Examples:
             else:
                 print(f"✅ Found {len(tasks)} task(s):")
                 print("-" * 50)
-                for i, task_id in enumerate(tasks, 1):
+                for i, (task_id, stats) in enumerate(tasks.items(), 1):
                     # Get some basic info about the task
-                    messages = memory_manager.load_conversation(task_id)
-                    message_count = len(messages)
-                    print(f"{i:2d}. {task_id} ({message_count} messages)")
+                    print(f"{i:2d}. {task_id} ({stats['message_count']} messages)")
                     
                     # Show first few words of the first message if available
-                    if messages:
-                        first_msg = messages[0]
+                    first_msg = stats['first_message']
+                    if first_msg:
                         if isinstance(first_msg, dict):
                             content = first_msg.get('content', first_msg.get('message', ''))
                         else:
@@ -753,21 +1078,18 @@ Examples:
             task_id = args.check_task
             print(f"🔍 Checking if task '{task_id}' exists...")
             
-            tasks = memory_manager.list_tasks()
-            if task_id in tasks:
+            if memory_manager.has_task(task_id) or memory_manager.is_archived(task_id):
                 messages = memory_manager.load_conversation(task_id)
                 message_count = len(messages)
                 print(f"✅ Task '{task_id}' exists!")
                 print(f"   📊 Messages: {message_count}")
                 
-                # Check if it has a wireframe
-                wireframe_found = False
-                for message in reversed(messages):
-                    if isinstance(message, dict) and 'content' in message:
-                        content = message['content']
-                        if 'CONSENSUS REACHED:' in content or 'wireframe' in content.lower():
-                            wireframe_found = True
-                            break
+                # Check if it has a wireframe (it is usually near the end)
+                wireframe_found = any(
+                    mentions_wireframe(message['content'])
+                    for message in reversed(messages)
+                    if isinstance(message, dict) and 'content' in message
+                )
                 
                 if wireframe_found:
                     print("   🎯 Wireframe: Found")
@@ -775,6 +1097,7 @@ Examples:
                     print("   🎯 Wireframe: Not found")
                     
             else:
+                tasks = memory_manager.list_tasks()
                 print(f"❌ Task '{task_id}' not found.")
                 print(f"💡 Available tasks: {', '.join(tasks) if tasks else 'None'}")
                 
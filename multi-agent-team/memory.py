@@ -1,33 +1,374 @@
 # memory.py
+import atexit
+import gzip
+import io
 import json
 import os
+import re
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 import logging
 
+try:
+    import orjson  # Optional: faster encoding/decoding of the history log
+except ImportError:
+    orjson = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-MEMORY_FILE = "conversation_history.json"
+MEMORY_FILE = "conversation_history.jsonl"
+LEGACY_MEMORY_FILE = "conversation_history.json"  # Single-document format used before the append-only log
+TASK_INDEX_SUFFIX = ".tasks.idx"  # Sidecar listing the task IDs in the log, one per line
 MAX_MEMORY_SIZE_MB = 50
 MAX_CONVERSATION_AGE_DAYS = 30
 MAX_CONVERSATION_SIZE_MB = 5
 
+# Tasks idle this long are moved out of the log into gzip archives when it grows too large
+ARCHIVE_AFTER_DAYS = 7
+ARCHIVE_INDEX_SUFFIX = ".archive.idx"  # Sidecar mapping archived task IDs to their archive files
+ARCHIVE_COMPRESSION_LEVEL = 6
+
+# Buffered messages are written once this many are pending or this much time has passed
+FLUSH_EVERY = 32
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Characters of each message kept in a conversation summary
+SUMMARY_MESSAGE_CHARS = 200
+
+# Task ID at the start of a log line, read without parsing the message
+TASK_ID_PREFIX = re.compile(rb'\{"task_id":\s*("(?:[^"\\]|\\.)*")')
+
+def _dumps(data: Any) -> bytes:
+    """Serialize data as compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _replace_file(path: str, payload: bytes) -> None:
+    """
+    Atomically replace a file's contents.
+    
+    The payload goes to a per-process temporary file in one unbuffered
+    write and is renamed over the target, so readers never see a partial
+    file and a crash leaves the old contents in place.
+    
+    Args:
+        path: File to replace
+        payload: Complete new contents
+    """
+    temp_file = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_file, 'wb', buffering=0) as f:
+            f.write(payload)
+        os.replace(temp_file, path)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+@lru_cache(maxsize=1024)
+def _query_to_task_id(query_key: str) -> str:
+    """Derive the deterministic task ID for a normalized query (memoized, the ID never changes)."""
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, query_key))
+
+@lru_cache(maxsize=256)
+def _record_prefix(task_id: str) -> bytes:
+    """Return the encoded '{"task_id":...,"msg":' head of a task's log lines (memoized per task)."""
+    return b'{"task_id":' + _dumps(task_id) + b',"msg":'
+
+def _stamp(message: Dict[str, Any], timestamp: str) -> Dict[str, Any]:
+    """Give a message dict the timestamp if it has none, returning the same dict."""
+    if "timestamp" not in message:
+        message["timestamp"] = timestamp
+    return message
+
+def _current_timestamp() -> str:
+    """Return the current time as a second-precision ISO timestamp."""
+    return datetime.now().isoformat(timespec="seconds")
+
+def _timestamp_key(timestamp: Any) -> Optional[str]:
+    """
+    Normalize a stored timestamp to a sortable "YYYY-MM-DDTHH:MM:SS" string.
+    
+    Accepts both str(datetime) ("YYYY-MM-DD HH:MM:SS.ffffff") and ISO
+    timestamps, so they can be compared as strings without parsing.
+    
+    Args:
+        timestamp: Stored timestamp value
+        
+    Returns:
+        Sortable key, or None if the value is not a timestamp
+    """
+    if not isinstance(timestamp, str) or len(timestamp) < 19 or timestamp[10] not in " T":
+        return None
+    return timestamp[:10] + "T" + timestamp[11:19]
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class Message:
+    """
+    A chat message with a fixed field layout, for callers building messages to save.
+    
+    Slots keep instances small, and encoding splices the three known fields
+    instead of serializing a dict. Loaded messages are still plain dicts
+    with the same keys.
+    """
+    
+    __slots__ = ("message", "timestamp", "agent")
+    
+    def __init__(self, message: str, timestamp: Optional[str] = None, agent: Optional[str] = None):
+        self.message = message
+        self.timestamp = timestamp
+        self.agent = agent
+    
+    def encode(self, default_timestamp: str) -> bytes:
+        """
+        Serialize the message as a compact JSON object.
+        
+        Args:
+            default_timestamp: Timestamp used if the message has none
+            
+        Returns:
+            Encoded JSON object (agent omitted when unset)
+        """
+        payload = b'{"message":' + _dumps(self.message) + b',"timestamp":' + _dumps(self.timestamp or default_timestamp)
+        if self.agent is not None:
+            payload += b',"agent":' + _dumps(self.agent)
+        return payload + b"}"
+
 class MemoryManager:
-    """Enhanced memory management for conversation history."""
+    """
+    Enhanced memory management for conversation history.
+    
+    History is an append-only JSON Lines log: each line is one compact
+    message record, {"task_id":...,"msg":{...}}. Saving appends only the
+    new messages instead of re-serializing every task. Loaded messages are
+    cached per task: the cache only reads bytes appended since the last
+    load and only parses the lines of the task being loaded. A small
+    sidecar index of task IDs lets list_tasks answer without reading the
+    log.
+    """
     
     def __init__(self, memory_file: str = MEMORY_FILE):
         self.memory_file = memory_file
+        self.index_file = os.path.splitext(memory_file)[0] + TASK_INDEX_SUFFIX
+        self.archive_index_file = os.path.splitext(memory_file)[0] + ARCHIVE_INDEX_SUFFIX
+        self._task_ids: Optional[Dict[str, None]] = None  # Ordered set, loaded on first use
+        self._archived: Optional[Dict[str, List[str]]] = None  # task_id -> archive file names, loaded on first use
+        self._cache: Optional[Dict[str, List[Dict[str, Any]]]] = None  # task_id -> parsed messages
+        self._unparsed: Dict[str, List[bytes]] = {}  # task_id -> log lines read but not yet parsed
+        self._cache_offset = 0  # Bytes of the log already read into the cache
+        self._cache_file_id = None  # (device, inode) of the log the cache was built from
+        self._pending: List[bytes] = []  # Encoded lines from buffer_message not yet written
+        self._pending_task_ids: Dict[str, None] = {}
+        self._last_flush = time.monotonic()
+        self._size_bytes: Optional[int] = None  # Log size as last stat'ed, advanced by our own writes
+        atexit.register(self.flush)
+        
+        # Set up (or migrate) the log once; later calls don't re-check the file
         self.initialize_memory()
     
     def initialize_memory(self) -> None:
-        """Initialize memory file if it doesn't exist."""
+        """Initialize memory file if it doesn't exist, migrating the legacy JSON file if present."""
         if not os.path.exists(self.memory_file):
-            with open(self.memory_file, 'w') as f:
-                json.dump({"tasks": {}, "metadata": {"created": str(datetime.now())}}, f, indent=2)
-            logger.info(f"Initialized memory file: {self.memory_file}")
+            if self.memory_file == MEMORY_FILE and os.path.exists(LEGACY_MEMORY_FILE):
+                self._migrate_legacy_file(LEGACY_MEMORY_FILE)
+            else:
+                open(self.memory_file, 'a').close()
+                self._write_index([])
+                logger.info(f"Initialized memory file: {self.memory_file}")
+        elif self._is_legacy_format():
+            self._migrate_legacy_file(self.memory_file)
+    
+    def _is_legacy_format(self) -> bool:
+        """Check whether the memory file is a pretty-printed single JSON document."""
+        with open(self.memory_file, 'r') as f:
+            return f.readline().strip() == "{"
+    
+    def _migrate_legacy_file(self, legacy_file: str) -> None:
+        """
+        Convert a legacy {"tasks": {...}} JSON document into the append-only log.
+        
+        Args:
+            legacy_file: Path of the legacy JSON file
+        """
+        with open(legacy_file, 'rb') as f:
+            data = _loads(f.read())
+        
+        lines = [
+            self._encode_record(task_id, msg)
+            for task_id, messages in data.get("tasks", {}).items()
+            for msg in messages
+        ]
+        self._rewrite(lines, list(data.get("tasks", {})))
+        logger.info(f"Migrated {len(lines)} messages from {legacy_file} to {self.memory_file}")
+    
+    @staticmethod
+    def _encode_record(task_id: str, msg: Dict[str, Any]) -> bytes:
+        """
+        Serialize one message as a compact log line.
+        
+        The record is spliced from the cached task prefix and the encoded
+        message, so no wrapper dict is allocated per message.
+        """
+        return _record_prefix(task_id) + _dumps(msg) + b"}\n"
+    
+    def _rewrite(self, lines: List[bytes], task_ids: List[str]) -> None:
+        """
+        Atomically replace the memory file with the given lines.
+        
+        Args:
+            lines: Encoded log lines
+            task_ids: Task IDs present in the lines, for the sidecar index
+        """
+        payload = b"".join(lines)
+        _replace_file(self.memory_file, payload)
+        self._size_bytes = len(payload)
+        self._write_index(task_ids)
+    
+    def _append(self, payload: bytes) -> None:
+        """
+        Append encoded lines to the log in a single write.
+        
+        Args:
+            payload: Encoded log lines
+        """
+        with open(self.memory_file, 'ab') as f:
+            f.write(payload)
+        if self._size_bytes is not None:
+            self._size_bytes += len(payload)
+    
+    def _write_index(self, task_ids: List[str]) -> None:
+        """Replace the sidecar task index."""
+        _replace_file(self.index_file, b"".join(_dumps(task_id) + b"\n" for task_id in task_ids))
+        self._task_ids = dict.fromkeys(task_ids)
+    
+    def _load_index(self) -> Dict[str, None]:
+        """
+        Return the task IDs of the log, reading the sidecar index once.
+        
+        The index is rebuilt with one pass over the log if it is missing
+        (e.g. a log written before the index existed).
+        
+        Returns:
+            Ordered dictionary keys of task IDs
+        """
+        if self._task_ids is None:
+            if os.path.exists(self.index_file):
+                with open(self.index_file, 'rb') as f:
+                    self._task_ids = dict.fromkeys(_loads(line) for line in f if line.strip())
+            else:
+                self._write_index(list(dict.fromkeys(record["task_id"] for record in self._iter_records())))
+        return self._task_ids
+    
+    def has_task(self, task_id: str) -> bool:
+        """
+        Check whether a task has any stored messages, using only the sidecar index.
+        
+        A miss re-reads the index, so tasks added by other processes are seen.
+        
+        Args:
+            task_id: Unique identifier for the task
+            
+        Returns:
+            True if the task is in memory
+        """
+        self.flush()
+        if task_id in self._load_index():
+            return True
+        self._task_ids = None
+        return task_id in self._load_index()
+    
+    def _register_task(self, task_id: str) -> None:
+        """Add a task to the sidecar index if it is not listed yet."""
+        task_ids = self._load_index()
+        if task_id not in task_ids:
+            with open(self.index_file, 'ab') as f:
+                f.write(_dumps(task_id) + b"\n")
+            task_ids[task_id] = None
+    
+    def _iter_records(self) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the records of the memory file.
+        
+        Yields:
+            Record dictionaries with "task_id" and "msg" keys
+        """
+        with open(self.memory_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield _loads(line)
+                except ValueError:
+                    # A torn final line from an interrupted append
+                    logger.warning(f"Skipping unreadable line in {self.memory_file}")
+    
+    def _sync_cache(self) -> None:
+        """
+        Read what was appended to the log since the last call.
+        
+        The log is append-only, so reading resumes from the last byte
+        offset, which also picks up appends by other processes. New lines
+        are only filed under their task ID (read from the line prefix); the
+        JSON is parsed when that task is loaded. The cache is rebuilt when
+        the file is replaced (compaction, migration) or shrinks.
+        """
+        stat = os.stat(self.memory_file)
+        file_id = (stat.st_dev, stat.st_ino)
+        if self._cache is None or file_id != self._cache_file_id or stat.st_size < self._cache_offset:
+            self._cache = {}
+            self._unparsed = {}
+            self._cache_offset = 0
+            self._cache_file_id = file_id
+        
+        if stat.st_size > self._cache_offset:
+            with open(self.memory_file, 'rb') as f:
+                f.seek(self._cache_offset)
+                data = f.read()
+            
+            # Leave an incomplete last line for a later call
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                match = TASK_ID_PREFIX.match(line)
+                try:
+                    task_id = _loads(match.group(1)) if match else _loads(line)["task_id"]
+                except (ValueError, KeyError, TypeError):
+                    if line.strip():
+                        logger.warning(f"Skipping unreadable line in {self.memory_file}")
+                    continue
+                self._unparsed.setdefault(task_id, []).append(line)
+            self._cache_offset += end
+    
+    def _task_messages(self, task_id: str) -> List[Dict[str, Any]]:
+        """
+        Return the cached messages of a task, parsing only that task's new lines.
+        
+        Args:
+            task_id: Unique identifier for the task
+            
+        Returns:
+            Cached list of message dictionaries (not to be mutated)
+        """
+        self.flush()
+        self._sync_cache()
+        messages = self._cache.setdefault(task_id, [])
+        for line in self._unparsed.pop(task_id, ()):
+            try:
+                messages.append(_loads(line)["msg"])
+            except (ValueError, KeyError, TypeError):
+                # A torn final line from an interrupted append
+                logger.warning(f"Skipping unreadable line in {self.memory_file}")
+        return messages
     
     def get_memory_size_mb(self) -> float:
         """Get current memory file size in MB."""
@@ -39,135 +380,382 @@ class MemoryManager:
         """
         Remove conversations older than max_age_days.
         
+        Messages are appended in order, so a conversation's age is taken
+        from its last timestamped message: only that line of each task is
+        parsed. The log is compacted in one pass: the raw lines of kept
+        tasks are written to a temporary file that replaces the memory
+        file, and the task index is rewritten to match.
+        
         Args:
             max_age_days: Maximum age in days for conversations to keep
             
         Returns:
             Number of conversations removed
         """
-        cutoff_date = datetime.now() - timedelta(days=max_age_days)
-        removed_count = 0
+        try:
+            return self._expire_tasks(max_age_days, archive=False)
+        except Exception as e:
+            logger.error(f"Error during cleanup: {e}")
+            return 0
+    
+    def archive_old_conversations(self, max_age_days: int = ARCHIVE_AFTER_DAYS) -> int:
+        """
+        Move conversations older than max_age_days into compressed archives.
+        
+        Expired tasks are appended to gzip files grouped by the month of
+        their last message (<log name>.archive-YYYY-MM.jsonl.gz) and removed
+        from the log, which is compacted as in cleanup_old_conversations.
+        Archived conversations are no longer listed by list_tasks, but
+        load_conversation still returns them.
         
+        Args:
+            max_age_days: Maximum age in days for conversations to keep in the log
+            
+        Returns:
+            Number of conversations archived
+        """
         try:
-            with open(self.memory_file, 'r') as f:
-                data = json.load(f)
+            return self._expire_tasks(max_age_days, archive=True)
+        except Exception as e:
+            logger.error(f"Error during archiving: {e}")
+            return 0
+    
+    def _expire_tasks(self, max_age_days: int, archive: bool) -> int:
+        """
+        Drop (or archive) conversations older than max_age_days from the log.
+        
+        Args:
+            max_age_days: Maximum age in days for conversations to keep
+            archive: Whether expired conversations are archived rather than deleted
             
-            cleaned_tasks = {}
-            for task_id, messages in data.get("tasks", {}).items():
-                if messages:
-                    # Get the latest timestamp from the conversation
-                    latest_timestamp = None
-                    for msg in messages:
-                        if "timestamp" in msg:
-                            try:
-                                msg_timestamp = datetime.fromisoformat(msg["timestamp"])
-                                if latest_timestamp is None or msg_timestamp > latest_timestamp:
-                                    latest_timestamp = msg_timestamp
-                            except ValueError:
-                                continue
-                    
-                    # Keep conversation if it's recent enough
-                    if latest_timestamp and latest_timestamp > cutoff_date:
-                        cleaned_tasks[task_id] = messages
-                    else:
-                        removed_count += 1
-                        logger.info(f"Removed old conversation: {task_id}")
+        Returns:
+            Number of conversations expired
+        """
+        cutoff_key = (datetime.now() - timedelta(days=max_age_days)).isoformat(timespec="seconds")
+        removed_count = 0
+        
+        self.flush()
+        tasks: Dict[str, List[bytes]] = {}
+        with open(self.memory_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A torn final line from an interrupted append
+                    continue
+                match = TASK_ID_PREFIX.match(line)
+                try:
+                    task_id = _loads(match.group(1)) if match else _loads(line)["task_id"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                tasks.setdefault(task_id, []).append(line)
+        
+        kept_lines = []
+        kept_tasks = []
+        archives: Dict[str, Dict[str, List[bytes]]] = {}  # archive month -> task_id -> lines
+        for task_id, lines in tasks.items():
+            # Get the latest timestamp from the conversation (its last timestamped message)
+            latest_timestamp = None
+            for line in reversed(lines):
+                try:
+                    latest_timestamp = _timestamp_key(_loads(line)["msg"].get("timestamp"))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue
+                if latest_timestamp:
+                    break
             
-            data["tasks"] = cleaned_tasks
-            data["metadata"] = data.get("metadata", {})
-            data["metadata"]["last_cleanup"] = str(datetime.now())
+            # Keep conversation if it's recent enough
+            if latest_timestamp and latest_timestamp > cutoff_key:
+                kept_tasks.append(task_id)
+                kept_lines.extend(lines)
+            else:
+                removed_count += 1
+                if archive:
+                    month = latest_timestamp[:7] if latest_timestamp else "undated"
+                    archives.setdefault(month, {})[task_id] = lines
+                else:
+                    logger.info(f"Removed old conversation: {task_id}")
+        
+        # Nothing expired: leave the log untouched
+        if removed_count == 0:
+            return 0
+        
+        # Archives are written before the log drops the lines
+        for month, archived_tasks in archives.items():
+            self._write_archive(month, archived_tasks)
+        
+        self._rewrite(kept_lines, kept_tasks)
+        
+        # Refill the cache from the lines in hand instead of re-reading the compacted log
+        stat = os.stat(self.memory_file)
+        self._cache = {}
+        self._unparsed = {task_id: [line[:-1] for line in tasks[task_id]] for task_id in kept_tasks}
+        self._cache_offset = self._size_bytes
+        self._cache_file_id = (stat.st_dev, stat.st_ino)
+        
+        logger.info(f"{'Archived' if archive else 'Cleaned up'} {removed_count} old conversations")
+        return removed_count
+    
+    def _write_archive(self, month: str, tasks: Dict[str, List[bytes]]) -> None:
+        """
+        Append tasks' raw log lines to a month's gzip archive and record them in the archive index.
+        
+        Args:
+            month: Archive month ("YYYY-MM" or "undated")
+            tasks: task_id -> encoded log lines
+        """
+        name = f"{os.path.basename(os.path.splitext(self.memory_file)[0])}.archive-{month}.jsonl.gz"
+        path = os.path.join(os.path.dirname(self.memory_file), name)
+        
+        # Each append adds a gzip member; readers see one continuous stream
+        with gzip.open(path, 'ab', compresslevel=ARCHIVE_COMPRESSION_LEVEL) as f:
+            f.write(b"".join(line for lines in tasks.values() for line in lines))
+        
+        archived = self._load_archive_index()
+        with open(self.archive_index_file, 'ab') as f:
+            f.write(b"".join(_dumps([task_id, name]) + b"\n" for task_id in tasks))
+        for task_id in tasks:
+            names = archived.setdefault(task_id, [])
+            if name not in names:
+                names.append(name)
+            logger.info(f"Archived old conversation: {task_id} -> {name}")
+    
+    def _load_archive_index(self, refresh: bool = False) -> Dict[str, List[str]]:
+        """
+        Return the archive file names of archived tasks, reading the archive index once.
+        
+        Args:
+            refresh: Re-read the index (e.g. to pick up another process's archiving)
             
-            with open(self.memory_file, 'w') as f:
-                json.dump(data, f, indent=2)
+        Returns:
+            Dictionary of task_id -> archive file names, oldest first
+        """
+        if self._archived is None or refresh:
+            archived: Dict[str, List[str]] = {}
+            if os.path.exists(self.archive_index_file):
+                with open(self.archive_index_file, 'rb') as f:
+                    for line in f:
+                        try:
+                            task_id, name = _loads(line)
+                        except (ValueError, TypeError):
+                            continue
+                        names = archived.setdefault(task_id, [])
+                        if name not in names:
+                            names.append(name)
+            self._archived = archived
+        return self._archived
+    
+    def is_archived(self, task_id: str) -> bool:
+        """
+        Check whether a task has messages in the compressed archives.
+        
+        Args:
+            task_id: Unique identifier for the task
             
-            logger.info(f"Cleaned up {removed_count} old conversations")
-            return removed_count
+        Returns:
+            True if the task was archived
+        """
+        if task_id in self._load_archive_index():
+            return True
+        return task_id in self._load_archive_index(refresh=True)
+    
+    def _archived_messages(self, task_id: str, names: List[str]) -> List[Dict[str, Any]]:
+        """
+        Stream a task's messages out of its archives.
+        
+        Only the task ID prefix of each archived line is read; lines of
+        other tasks are never parsed.
+        
+        Args:
+            task_id: Unique identifier for the task
+            names: Archive file names holding the task, oldest first
             
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
-            return 0
+        Returns:
+            List of message dictionaries
+        """
+        messages = []
+        directory = os.path.dirname(self.memory_file)
+        for name in names:
+            with gzip.open(os.path.join(directory, name), 'rb') as f:
+                for line in f:
+                    match = TASK_ID_PREFIX.match(line)
+                    try:
+                        if match and _loads(match.group(1)) == task_id:
+                            messages.append(_loads(line)["msg"])
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning(f"Skipping unreadable line in {name}")
+        return messages
     
     def check_memory_size(self) -> bool:
         """
-        Check if memory file is getting too large and trigger cleanup if needed.
+        Check if memory file is getting too large and archive idle conversations if needed.
+        
+        The file is stat'ed once; afterwards its size is tracked as this
+        manager appends and compacts it.
         
         Returns:
-            True if cleanup was performed, False otherwise
+            True if archiving was performed, False otherwise
         """
-        current_size = self.get_memory_size_mb()
+        if self._size_bytes is None:
+            self._size_bytes = os.path.getsize(self.memory_file) if os.path.exists(self.memory_file) else 0
+        current_size = self._size_bytes / (1024 * 1024)
         
         if current_size > MAX_MEMORY_SIZE_MB:
             logger.warning(f"Memory size ({current_size:.2f}MB) exceeds limit ({MAX_MEMORY_SIZE_MB}MB)")
-            self.cleanup_old_conversations(max_age_days=7)  # More aggressive cleanup
+            self.archive_old_conversations()  # Move idle tasks out of the log
             return True
         
         return False
     
-    def save_conversation(self, task_id: str, messages: List[Dict[str, Any]]) -> None:
+    def save_conversation(self, task_id: str, messages: Iterable[Dict[str, Any]]) -> None:
         """
         Save conversation messages to memory.
         
+        Messages are appended to the log; nothing already stored is rewritten.
+        They are encoded as they are consumed, so a generator is never
+        materialized as a list.
+        
         Args:
             task_id: Unique identifier for the task
-            messages: List of message dictionaries
+            messages: Message dictionaries (any iterable); use save_raw_strings for plain strings
+        """
+        # Add timestamp to each message if not present (one timestamp per batch)
+        now = _current_timestamp()
+        self._save_lines(task_id, (self._encode_record(task_id, _stamp(msg, now)) for msg in messages))
+    
+    def save_messages(self, task_id: str, messages: Iterable[Message]) -> None:
+        """
+        Save Message objects to memory, encoding each one without building a dict.
+        
+        Args:
+            task_id: Unique identifier for the task
+            messages: Message objects (any iterable)
+        """
+        now = _current_timestamp()
+        prefix = _record_prefix(task_id)
+        self._save_lines(task_id, (prefix + msg.encode(now) + b"}\n" for msg in messages))
+    
+    def _save_lines(self, task_id: str, lines: Iterable[bytes]) -> None:
+        """
+        Append a batch of encoded log lines for one task.
+        
+        Args:
+            task_id: Unique identifier for the task
+            lines: Encoded log lines, consumed lazily
         """
         try:
-            self.initialize_memory()
-            
             # Check memory size before saving
             self.check_memory_size()
             
-            with open(self.memory_file, 'r') as f:
-                data = json.load(f)
-            
-            # Add timestamp to each message if not present
-            timestamped_messages = []
-            for msg in messages:
-                if isinstance(msg, dict):
-                    if "timestamp" not in msg:
-                        msg["timestamp"] = str(datetime.now())
-                    timestamped_messages.append(msg)
-                else:
-                    # Handle string messages
-                    timestamped_messages.append({
-                        "message": str(msg),
-                        "timestamp": str(datetime.now())
-                    })
-            
-            # Store messages by task_id
-            data["tasks"].setdefault(task_id, []).extend(timestamped_messages)
+            # Keep buffered messages ahead of this batch
+            self.flush()
             
-            # Update metadata
-            data["metadata"] = data.get("metadata", {})
-            data["metadata"]["last_updated"] = str(datetime.now())
-            data["metadata"]["total_tasks"] = len(data["tasks"])
+            # Append one line per message, as a single write so concurrent appends don't interleave
+            lines = list(lines)
+            self._append(b"".join(lines))
+            self._register_task(task_id)
             
-            with open(self.memory_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            logger.info(f"Saved {len(timestamped_messages)} messages for task: {task_id}")
+            logger.info(f"Saved {len(lines)} messages for task: {task_id}")
             
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
             raise
     
-    def load_conversation(self, task_id: str) -> List[Dict[str, Any]]:
+    def save_raw_strings(self, task_id: str, messages: Iterable[Any]) -> None:
+        """
+        Save plain (non-dict) messages, wrapping each one as {"message": str(msg)}.
+        
+        Args:
+            task_id: Unique identifier for the task
+            messages: Messages to store as strings
+        """
+        self.save_messages(task_id, (Message(str(msg)) for msg in messages))
+    
+    def append_message(self, task_id: str, message: Dict[str, Any]) -> None:
+        """
+        Append a single message to a task's conversation as soon as it is produced.
+        
+        Args:
+            task_id: Unique identifier for the task
+            message: Message dictionary (should carry its own timestamp)
+        """
+        if "timestamp" not in message:
+            message["timestamp"] = _current_timestamp()
+        
+        self.flush()
+        self._append(self._encode_record(task_id, message))
+        self._register_task(task_id)
+    
+    def buffer_message(self, task_id: str, message: Dict[str, Any]) -> None:
+        """
+        Queue a message for appending, writing queued messages in batches.
+        
+        The queue is written in one append once FLUSH_EVERY messages are
+        pending or FLUSH_INTERVAL_SECONDS have passed since the last write,
+        before any read, and at interpreter exit.
+        
+        Args:
+            task_id: Unique identifier for the task
+            message: Message dictionary (should carry its own timestamp)
+        """
+        if "timestamp" not in message:
+            message["timestamp"] = _current_timestamp()
+        
+        self._pending.append(self._encode_record(task_id, message))
+        self._pending_task_ids[task_id] = None
+        if len(self._pending) >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write messages queued by buffer_message to the log."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        
+        payload = b"".join(self._pending)
+        task_ids = list(self._pending_task_ids)
+        self._pending = []
+        self._pending_task_ids = {}
+        
+        self._append(payload)
+        for task_id in task_ids:
+            self._register_task(task_id)
+    
+    def iter_conversation(self, task_id: str) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the messages of a task in the order they were saved.
+        
+        Args:
+            task_id: Unique identifier for the task
+            
+        Yields:
+            Message dictionaries
+        """
+        yield from list(self._task_messages(task_id))
+    
+    def load_conversation(self, task_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Load conversation messages for a specific task.
         
         Args:
             task_id: Unique identifier for the task
+            limit: Optional maximum number of most recent messages to return
             
         Returns:
             List of message dictionaries
         """
         try:
-            self.initialize_memory()
-            
-            with open(self.memory_file, 'r') as f:
-                data = json.load(f)
+            # New tasks need no pass over the log; archived history comes first
+            in_log = self.has_task(task_id)
+            archives = self._load_archive_index(refresh=not in_log).get(task_id)
+            if not in_log and not archives:
+                return []
             
-            messages = data.get("tasks", {}).get(task_id, [])
+            messages = self._task_messages(task_id) if in_log else []
+            if archives:
+                messages = self._archived_messages(task_id, archives) + messages
+            if limit is None:
+                messages = list(messages)
+            else:
+                messages = messages[-limit:] if limit > 0 else []
             logger.info(f"Loaded {len(messages)} messages for task: {task_id}")
             return messages
             
@@ -175,6 +763,32 @@ class MemoryManager:
             logger.error(f"Error loading conversation: {e}")
             return []
     
+    def export_conversations(self, path: str, task_ids: Optional[List[str]] = None) -> None:
+        """
+        Write conversations to an indented JSON document for reading by hand.
+        
+        The log itself stays compact; this produces the {"tasks": {...}}
+        layout of the legacy history file, which can also be migrated back.
+        
+        Args:
+            path: Output file path
+            task_ids: Optional tasks to export (all tasks if not provided)
+        """
+        self.flush()
+        wanted = set(task_ids) if task_ids is not None else None
+        tasks: Dict[str, List[Dict[str, Any]]] = {}
+        for record in self._iter_records():
+            if wanted is None or record["task_id"] in wanted:
+                tasks.setdefault(record["task_id"], []).append(record["msg"])
+        
+        # Encode once and replace the file in a single write
+        if orjson is not None:
+            payload = orjson.dumps({"tasks": tasks}, option=orjson.OPT_INDENT_2)
+        else:
+            payload = json.dumps({"tasks": tasks}, indent=2, ensure_ascii=False).encode("utf-8")
+        _replace_file(path, payload)
+        logger.info(f"Exported {len(tasks)} conversations to {path}")
+    
     def generate_task_id(self, query: str) -> str:
         """
         Generate a unique task ID based on the query.
@@ -187,7 +801,7 @@ class MemoryManager:
         """
         # Create a deterministic ID based on query content
         query_key = query[:50].lower().strip()
-        return str(uuid.uuid5(uuid.NAMESPACE_DNS, query_key))
+        return _query_to_task_id(query_key)
     
     def get_conversation_summary(self, task_id: str, max_messages: int = 5) -> str:
         """
@@ -200,37 +814,76 @@ class MemoryManager:
         Returns:
             Summary string of recent conversation
         """
-        messages = self.load_conversation(task_id)
-        if not messages:
+        # Only the most recent messages are needed
+        recent_messages = self.load_conversation(task_id, limit=max_messages)
+        if not recent_messages:
             return ""
         
-        # Get the most recent messages
-        recent_messages = messages[-max_messages:]
-        summary_parts = []
+        # Write each (truncated) message straight into one buffer
+        summary = io.StringIO()
         
         for msg in recent_messages:
-            if isinstance(msg, dict):
-                content = msg.get("message", msg.get("content", ""))
-            else:
-                content = str(msg)
-            
+            content = msg.get("message") or msg.get("content") or ""
             if content:
-                summary_parts.append(content[:200] + "..." if len(content) > 200 else content)
+                summary.write(content[:SUMMARY_MESSAGE_CHARS])
+                summary.write("...\n" if len(content) > SUMMARY_MESSAGE_CHARS else "\n")
+        
+        return summary.getvalue()[:-1]
+    
+    def get_task_overview(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Count the messages of every task and return each task's first message.
+        
+        One pass over the log: only the task ID prefix of each line is read,
+        and a message body is parsed only for the first line of a task.
+        
+        Returns:
+            Dictionary of task_id -> {"message_count": int, "first_message": dict},
+            in the order tasks were first saved
+        """
+        overview: Dict[str, Dict[str, Any]] = {}
+        try:
+            self.flush()
+            with open(self.memory_file, 'rb') as f:
+                for line in f:
+                    match = TASK_ID_PREFIX.match(line)
+                    if match:
+                        task_id = _loads(match.group(1))
+                    elif line.strip():
+                        # Unexpected layout: fall back to parsing the line
+                        try:
+                            task_id = _loads(line)["task_id"]
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                    else:
+                        continue
+                    
+                    stats = overview.get(task_id)
+                    if stats is not None:
+                        stats["message_count"] += 1
+                        continue
+                    
+                    try:
+                        first_message = _loads(line)["msg"]
+                    except (ValueError, KeyError, TypeError):
+                        # A torn final line from an interrupted append
+                        continue
+                    overview[task_id] = {"message_count": 1, "first_message": first_message}
+        except Exception as e:
+            logger.error(f"Error reading task overview: {e}")
         
-        return "\n".join(summary_parts)
+        return overview
     
     def list_tasks(self) -> List[str]:
         """
-        List all task IDs in memory.
+        List all task IDs in memory, from the sidecar index.
         
         Returns:
             List of task IDs
         """
         try:
-            with open(self.memory_file, 'r') as f:
-                data = json.load(f)
-            
-            return list(data.get("tasks", {}).keys())
+            self.flush()
+            return list(self._load_index())
             
         except Exception as e:
             logger.error(f"Error listing tasks: {e}")
@@ -248,9 +901,9 @@ def save_conversation(task_id: str, messages: List[Dict[str, Any]]) -> None:
     """Save conversation (deprecated - use MemoryManager directly)."""
     memory_manager.save_conversation(task_id, messages)
 
-def load_conversation(task_id: str) -> List[Dict[str, Any]]:
+def load_conversation(task_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Load conversation (deprecated - use MemoryManager directly)."""
-    return memory_manager.load_conversation(task_id)
+    return memory_manager.load_conversation(task_id, limit=limit)
 
 def generate_task_id(query: str) -> str:
     """Generate task ID (deprecated - use MemoryManager directly)."""
@@ -259,9 +912,10 @@ def generate_task_id(query: str) -> str:
 if __name__ == "__main__":
     # Test memory management
     test_task_id = "test-task-123"
+    now = _current_timestamp()
     test_messages = [
-        {"message": "Hello", "timestamp": str(datetime.now())},
-        {"message": "World", "timestamp": str(datetime.now())}
+        {"message": "Hello", "timestamp": now},
+        {"message": "World", "timestamp": now}
     ]
     
     # Test save and load
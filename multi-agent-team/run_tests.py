@@ -4,6 +4,9 @@ Test runner for the Multi-Agent Team system.
 Runs all tests and provides a comprehensive report.
 """
 
+import argparse
+import importlib
+import logging
 import os
 import sys
 import unittest
@@ -13,6 +16,23 @@ from datetime import datetime
 # Set testing environment
 os.environ["TESTING"] = "1"
 
+# Modules imported by the quick tests
+QUICK_TEST_MODULES = (
+    "config",
+    "memory",
+    "utils",
+    "conversation_state",
+    "consensus",
+    "agents",
+    "main"
+)
+
+# Command-line interface, built once at import so main() can be called repeatedly
+PARSER = argparse.ArgumentParser(description="Test runner for Multi-Agent Team system")
+PARSER.add_argument("--quick", "-q", action="store_true", help="Run quick tests only")
+PARSER.add_argument("--specific", "-s", type=str, help="Run specific test")
+PARSER.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
+
 def run_all_tests():
     """Run all tests and return results."""
     print("🧪 Running Multi-Agent Team System Tests")
@@ -86,20 +106,10 @@ def run_quick_tests():
     print("=" * 50)
     
     # Test basic imports
-    tests = [
-        ("config", "import config"),
-        ("memory", "import memory"),
-        ("utils", "import utils"),
-        ("conversation_state", "import conversation_state"),
-        ("consensus", "import consensus"),
-        ("agents", "import agents"),
-        ("main", "import main")
-    ]
-    
     results = []
-    for name, import_stmt in tests:
+    for name in QUICK_TEST_MODULES:
         try:
-            exec(import_stmt)
+            importlib.import_module(name)
             print(f"  ✅ {name} - OK")
             results.append(True)
         except Exception as e:
@@ -111,12 +121,7 @@ def run_quick_tests():
 
 def main():
     """Main test runner."""
-    parser = argparse.ArgumentParser(description="Test runner for Multi-Agent Team system")
-    parser.add_argument("--quick", "-q", action="store_true", help="Run quick tests only")
-    parser.add_argument("--specific", "-s", type=str, help="Run specific test")
-    parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
-    
-    args = parser.parse_args()
+    args = PARSER.parse_args()
     
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -131,6 +136,4 @@ def main():
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
-    import argparse
-    import logging
     main() 
\ No newline at end of file
@@ -0,0 +1,53 @@
+# similarity.py
+import hashlib
+import operator
+import struct
+from typing import Iterable, Tuple
+
+# MinHash parameters: each token is hashed into this many independent 32-bit lanes
+DEFAULT_NUM_PERM = 64
+_LANE_BYTES = 4
+
+def _token_lanes(token: str, num_perm: int) -> Tuple[int, ...]:
+    """Hash a token into num_perm unsigned 32-bit lanes with one SHAKE-128 call (little-endian on every platform)."""
+    digest = hashlib.shake_128(token.encode("utf-8")).digest(_LANE_BYTES * num_perm)
+    return struct.unpack(f"<{num_perm}I", digest)
+
+def minhash_signature(tokens: Iterable[str], num_perm: int = DEFAULT_NUM_PERM) -> Tuple[int, ...]:
+    """
+    Compute a MinHash signature for a set of tokens.
+
+    Each token is hashed once into num_perm lanes and the signature is the
+    per-lane minimum, so the work is one C-level hash per token plus a
+    zip/min reduction instead of num_perm Python-level hash evaluations.
+    Signatures are deterministic across processes (the built-in salted
+    hash is not used), so they can be cached or stored.
+
+    Args:
+        tokens: Tokens of a message
+        num_perm: Number of hash lanes (signature length)
+
+    Returns:
+        Signature tuple, empty if there are no tokens
+    """
+    lanes = [_token_lanes(token, num_perm) for token in set(tokens)]
+    if not lanes:
+        return ()
+
+    return tuple(map(min, zip(*lanes)))
+
+def signature_similarity(signature1: Tuple[int, ...], signature2: Tuple[int, ...]) -> float:
+    """
+    Estimate the Jaccard similarity of two token sets from their signatures.
+
+    Args:
+        signature1: MinHash signature of the first token set
+        signature2: MinHash signature of the second token set
+
+    Returns:
+        Estimated similarity between 0.0 and 1.0 (0.0 if either is empty)
+    """
+    if not signature1 or not signature2 or len(signature1) != len(signature2):
+        return 0.0
+
+    return sum(map(operator.eq, signature1, signature2)) / len(signature1)
@@ -154,7 +154,9 @@ def test_performance():
         # Test memory usage
         start_time = time.time()
         test_task_id = "perf-test-123"
-        test_messages = [{"message": f"Message {i}", "timestamp": str(datetime.now())} for i in range(100)]
+        message_count = 100
+        now = str(datetime.now())
+        test_messages = ({"message": f"Message {i}", "timestamp": now} for i in range(message_count))
         
         memory.memory_manager.save_conversation(test_task_id, test_messages)
         loaded_messages = memory.memory_manager.load_conversation(test_task_id)
@@ -162,7 +164,7 @@ def test_performance():
         end_time = time.time()
         duration = end_time - start_time
         
-        print(f"Memory operations: {len(test_messages)} messages in {duration:.3f}s")
+        print(f"Memory operations: {message_count} messages in {duration:.3f}s")
         print(f"Memory size: {memory.memory_manager.get_memory_size_mb():.2f}MB")
         
         if duration < 1.0:  # Should be very fast
@@ -5,7 +5,7 @@ Test script for the enhanced interactive mode functionality.
 
 import os
 import sys
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Set testing environment
 os.environ["TESTING"] = "1"
@@ -17,6 +17,7 @@ def test_interactive_mode():
     
     try:
         from main import MultiAgentTeam
+        import agents
         
         # Create app instance
         app = MultiAgentTeam()
@@ -27,12 +28,12 @@ def test_interactive_mode():
         print("Testing progress updates...")
         
         # Mock the necessary components for testing
-        with patch('main.create_agents') as mock_create_agents, \
-             patch('main.setup_group_chat') as mock_setup_chat, \
+        with patch('agents.create_agents') as mock_create_agents, \
+             patch('agents.setup_group_chat') as mock_setup_chat, \
              patch('main.memory_manager') as mock_memory, \
-             patch('main.parse_user_input') as mock_parse, \
-             patch('main.extract_json_from_message') as mock_extract, \
-             patch('main.validate_wireframe') as mock_validate:
+             patch('utils.parse_user_input') as mock_parse, \
+             patch('utils.extract_json_from_message') as mock_extract, \
+             patch('utils.validate_wireframe') as mock_validate:
             
             # Setup mocks
             mock_parse.return_value = {
@@ -45,13 +46,13 @@ def test_interactive_mode():
             mock_memory.save_conversation.return_value = None
             
             mock_agents = [MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock(), MagicMock()]
-            mock_agents[0].initiate_chat.return_value = MagicMock(
+            mock_agents[0].a_initiate_chat = AsyncMock(return_value=MagicMock(
                 chat_history=[
                     {"content": "Test message 1", "name": "Agent1"},
                     {"content": 'CONSENSUS REACHED: {"app": {"name": "Test", "description": "Test", "screens": [], "version_history": []}}', "name": "Agent2"}
                 ]
-            )
-            mock_create_agents.return_value = mock_agents
+            ))
+            mock_create_agents.return_value = agents.AgentBundle(mock_agents[0], mock_agents[1:])
             mock_setup_chat.return_value = MagicMock()
             
             mock_extract.return_value = {
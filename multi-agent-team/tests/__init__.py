@@ -0,0 +1,12 @@
+"""
+Test package for the Multi-Agent Team system.
+
+config reads TESTING when it is imported, so testing mode is set here,
+before any test module (and through it config) is imported, whichever
+runner loads the package.
+"""
+
+import os
+
+# Set testing environment
+os.environ["TESTING"] = "1"